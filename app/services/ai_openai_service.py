@@ -4,7 +4,12 @@ from openai import OpenAI, OpenAIError
 from PIL import Image
 import io
 
+from app.services.page_bitmap import PageBitmap
+
 class OpenAIService:
+    # Longest side of images sent to the API (saves tokens/bandwidth)
+    MAX_IMAGE_SIZE = 2048
+
     def __init__(self, db_service):
         self.db = db_service
         self.client = None
@@ -48,9 +53,11 @@ class OpenAIService:
         if pil_image.mode != 'RGB':
             pil_image = pil_image.convert('RGB')
         
-        # Resize if too large to save token/bandwidth (max 2048px)
-        max_size = 2048
+        # Resize if too large to save token/bandwidth
+        max_size = self.MAX_IMAGE_SIZE
         if max(pil_image.size) > max_size:
+            # Separate handle: the caller's image may be a cached pipeline result
+            pil_image = PageBitmap.share(pil_image)
             pil_image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
             
         buffered = io.BytesIO()
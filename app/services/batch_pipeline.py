@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BatchScanPipeline:
+    """
+    Producer/consumer batch scanning.
+
+    One acquisition thread calls acquire() for every page, a thread pool runs
+    process(image) on the acquired pages (blank detection, deskew,
+    thumbnail...) and finished results are handed to deliver(results) on the
+    UI thread through post(), several pages at a time and in scan order.
+    Instead of a fixed delay between scans, acquisition blocks while
+    max_pending pages are acquired but not yet delivered (back-pressure).
+    """
+
+    def __init__(self, acquire, process, deliver, post, on_finished=None, on_error=None,
+                 target=0, workers=2, max_pending=None):
+        self.acquire = acquire
+        self.process = process
+        self.deliver = deliver
+        self.post = post
+        self.on_finished = on_finished
+        self.on_error = on_error
+        self.target = target  # 0 = until stopped or acquire() returns None
+        self.workers = workers
+        self.acquired = 0
+        self.delivered = 0
+        self.started = None
+        self._slots = threading.Semaphore(max_pending or 2 * workers)
+        self._stop = threading.Event()
+        self._inflight = deque()  # Futures in scan order
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        self._acquiring = False
+        self._error = None
+        self._finished = False
+        self._pool = None
+
+    @property
+    def running(self):
+        return self._acquiring or bool(self._inflight)
+
+    @property
+    def pages_per_minute(self):
+        if not self.started or not self.delivered: return 0.0
+        return self.delivered * 60.0 / max(time.perf_counter() - self.started, 1e-6)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._acquiring = True
+        threading.Thread(target=self._acquire_loop, daemon=True).start()
+
+    def stop(self):
+        """Stops acquiring; pages already acquired are still processed and delivered"""
+        self._stop.set()
+
+    def _acquire_loop(self):
+        try:
+            while not self._stop.is_set():
+                if self.target > 0 and self.acquired >= self.target: break
+                # Back-pressure: wait for a free slot, checking for stop now and then
+                if not self._slots.acquire(timeout=0.2): continue
+                img = self.acquire()
+                if img is None or self._stop.is_set():
+                    self._slots.release()
+                    break
+                self.acquired += 1
+                future = self._pool.submit(self.process, img)
+                with self._lock:
+                    self._inflight.append(future)
+                future.add_done_callback(lambda f: self._schedule_flush())
+        except Exception as e:
+            self._error = e
+        finally:
+            self._acquiring = False
+            self._pool.shutdown(wait=False)
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._lock:
+            if self._flush_scheduled: return
+            self._flush_scheduled = True
+        self.post(self._flush)
+
+    def _flush(self):
+        """UI thread: delivers every finished page at the head of the queue, in scan order"""
+        results = []
+        with self._lock:
+            self._flush_scheduled = False
+            while self._inflight and self._inflight[0].done():
+                future = self._inflight.popleft()
+                self._slots.release()
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    self._error = self._error or e
+            finished = not self._acquiring and not self._inflight and not self._finished
+            if finished: self._finished = True
+        if results:
+            self.delivered += len(results)
+            self.deliver(results)
+        if finished:
+            if self._error is not None and self.on_error:
+                self.on_error(self._error)
+            elif self.on_finished:
+                self.on_finished()
@@ -0,0 +1,81 @@
+from app.services.edit_pipeline import EditPipeline
+from app.services.image_service import ImageProcessor
+from app.services.worker_pool import ordered_map
+
+# Processing steps: ImageProcessor fixes that take and return a PIL image
+STEPS = {
+    'perspective': ImageProcessor.automatic_document_transform,
+    'deskew': ImageProcessor.deskew_image,
+    'straighten': ImageProcessor.auto_straighten_simple,
+    'clean': ImageProcessor.enhance_document_text,
+    'privacy_blur': ImageProcessor.redact_faces,
+}
+BLANK_DROP = 'blank_drop'  # Step that removes the page when it is blank
+
+# Built-in profiles: name -> steps, run in order
+PROFILES = {
+    "Deskew + Clean + Drop blanks": (BLANK_DROP, 'deskew', 'clean'),
+    "Perspective + Clean": ('perspective', 'clean'),
+    "Straighten": ('deskew',),
+    "Straighten text lines": ('straighten',),
+    "Privacy blur": ('privacy_blur',),
+    "Drop blanks": (BLANK_DROP,),
+}
+
+# Per-page outcomes of run_profile
+PROCESSED, DROPPED, FAILED = "processed", "dropped", "failed"
+
+
+def run_steps(snapshot, steps, privacy_mode="blur"):
+    """
+    Renders an EditPipeline.snapshot() and runs the steps on it (worker process entry point).
+    privacy_mode is the redact_faces mode of the 'privacy_blur' step.
+    Returns the processed image, or None when BLANK_DROP found the page blank.
+    """
+    img = EditPipeline().render(snapshot)
+    for step in steps:
+        if step == BLANK_DROP:
+            if ImageProcessor.detect_blank_page(img): return None
+        elif step == 'privacy_blur':
+            img = STEPS[step](img, privacy_mode)
+        else:
+            img = STEPS[step](img)
+    return img
+
+
+def processed_pages(pages, snapshot, steps, workers=1, privacy_mode="blur"):
+    """
+    Yields (page, image, error) for every page, in page order: the
+    run_steps() result, or the exception the page failed with.
+    With workers > 1 pages are processed in a process pool (see ordered_map).
+    """
+    jobs = ((page, (snapshot(page), steps, privacy_mode)) for page in pages)
+    return ordered_map(run_steps, jobs, workers)
+
+
+def run_profile(pages, snapshot, steps, deliver, progress=None, cancel_event=None, workers=1,
+                privacy_mode="blur"):
+    """
+    Runs the steps of a profile over pages. snapshot(page) returns the page's
+    EditPipeline.snapshot(); deliver(page, image, error) is called for every
+    finished page, in page order, as soon as it is ready, so a cancelled run
+    keeps the pages done so far. progress(done, total) is called after every page.
+    privacy_mode ("blur" or "pixelate") is passed to redact_faces by the 'privacy_blur' step.
+    Returns one PROCESSED / DROPPED / FAILED outcome per page, or None if
+    cancel_event was set.
+    """
+    total = len(pages)
+    workers = max(1, min(workers, total))
+    outcomes = []
+    results = processed_pages(pages, snapshot, steps, workers, privacy_mode)
+    try:
+        for i, (page, img, error) in enumerate(results):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            deliver(page, img, error)
+            outcomes.append(FAILED if error is not None else DROPPED if img is None else PROCESSED)
+            if progress:
+                progress(i + 1, total)
+    finally:
+        results.close()
+    return outcomes
@@ -0,0 +1,231 @@
+import threading
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+class EditPipeline:
+    """
+    Non-destructive edit chain for a single page, shared by preview,
+    thumbnails, export, OCR and save.
+
+    Every stage caches its output together with the parameters of all the
+    stages before it, so a change to a late stage (e.g. contrast) restarts
+    from the cached intermediate instead of from the full-resolution original.
+    The final render is kept as a render cache keyed by the original and a
+    hash of the edit parameters: rendering an unchanged page returns it as is.
+    `revision` increases with every new render, so derived bitmaps
+    (thumbnails) can be cached per page revision.
+    Cached images are shared, never mutate a rendered result in place.
+
+    With max_size set the pipeline works on a downsampled proxy of the
+    original instead (live preview); `scale` is the proxy/original ratio.
+    Rendering is serialized so a page can be rendered from a background worker.
+    """
+
+    # Stage order mirrors the original ImageProcessor.process_page chain,
+    # brightness and contrast are fused into a single 'tone' stage
+    STAGES = ('rotation', 'flip', 'grayscale', 'tone')
+
+    # Page dict keys the stages read
+    EDIT_KEYS = ('rotation', 'flip_h', 'flip_v', 'grayscale', 'brightness', 'contrast')
+
+    # Edit parameters of an unedited page
+    NO_EDITS = {'rotation': 0, 'flip_h': False, 'flip_v': False, 'brightness': 1.0, 'contrast': 1.0, 'grayscale': False}
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.scale = 1.0
+        self._source = None
+        self._base = None
+        self._cache = {}  # stage name -> (key, image)
+        self._result = None  # (original, edit hash, rendered image)
+        self.revision = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def stage_params(stage, page_data):
+        """Returns the hashable parameters a stage depends on."""
+        if stage == 'flip':
+            return (page_data['flip_h'], page_data['flip_v'])
+        if stage == 'tone':
+            return (page_data['brightness'], page_data['contrast'])
+        return page_data[stage]
+
+    @staticmethod
+    def edit_hash(page_data):
+        """Hash of all edit parameters of a page."""
+        return hash(tuple(page_data[k] for k in EditPipeline.EDIT_KEYS))
+
+    @staticmethod
+    def snapshot(page_data):
+        """
+        Copies the original and edit parameters so a render can run off the UI thread.
+        Also records the page's original_revision and edit_hash, which identify
+        what the snapshot renders (e.g. as an export cache key).
+        """
+        # Revision first: an original replaced right after it is read is then never labelled as the old one
+        snap = {'original_revision': getattr(page_data, 'original_revision', 0)}
+        snap.update((k, page_data[k]) for k in EditPipeline.EDIT_KEYS)
+        snap['original'] = page_data['original']
+        snap['edit_hash'] = EditPipeline.edit_hash(snap)
+        return snap
+
+    @staticmethod
+    def is_current(snap, page_data):
+        """True if page_data still has the original and edits captured in snap."""
+        # .get() never reloads a page spilled to disk (see PageData)
+        if page_data.get('original') is not snap['original']:
+            return False
+        return all(page_data[k] == snap[k] for k in EditPipeline.EDIT_KEYS)
+
+    def is_rendered(self, page_data):
+        """True if the cached render matches the page's current original and edits."""
+        result = self._result
+        return (result is not None and result[0] is page_data.get('original')
+                and result[1] == self.edit_hash(page_data))
+
+    def render(self, page_data):
+        """
+        Renders page_data['original'] with all edits applied.
+        Returns the cached render if nothing changed, otherwise only stages
+        whose parameters (or upstream parameters) changed are recomputed.
+        """
+        with self._lock:
+            source = page_data['original']
+            edit_hash = self.edit_hash(page_data)
+            if self._result is not None and self._result[0] is source and self._result[1] == edit_hash:
+                return self._result[2]
+
+            if source is not self._source:
+                # New original (crop, undo, AI fix...) - nothing cached is valid
+                self.invalidate()
+                self._source = source
+                self._base = self._make_base(source)
+
+            img = self._base
+            key = ()
+            for stage in self.STAGES:
+                key = key + (self.stage_params(stage, page_data),)
+                cached = self._cache.get(stage)
+                if cached is not None and cached[0] == key:
+                    img = cached[1]
+                    continue
+                img = getattr(self, f"_apply_{stage}")(img, page_data)
+                self._cache[stage] = (key, img)
+
+            self._result = (source, edit_hash, img)
+            self.revision += 1
+            return img
+
+    def _make_base(self, source):
+        """Returns the image the stages start from: the original or its proxy."""
+        self.scale = 1.0
+        if not self.max_size:
+            return source
+        max_w, max_h = self.max_size
+        if source.width <= max_w and source.height <= max_h:
+            return source
+        self.scale = min(max_w / source.width, max_h / source.height)
+        size = (max(1, int(source.width * self.scale)), max(1, int(source.height * self.scale)))
+        return source.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    def images(self):
+        """
+        Every image held by the pipeline: base/proxy, stage intermediates and the cached render.
+        Reads without the render lock (a momentary view is enough for memory accounting),
+        so the PageStore never waits for a render in progress while holding its own lock.
+        """
+        result = self._result
+        imgs = [self._base] + [img for _, img in list(self._cache.values())]
+        if result is not None:
+            imgs.append(result[2])
+        return [img for img in imgs if img is not None]
+
+    def invalidate(self):
+        """Drops every cached intermediate and the cached render."""
+        with self._lock:
+            self._source = None
+            self._base = None
+            self._cache.clear()
+            self._result = None
+
+    def release(self):
+        """Frees the intermediates of a page that is no longer being edited, keeping its final render."""
+        with self._lock:
+            self._source = None
+            self._base = None
+            self._cache.clear()
+
+    # --- Stages ---
+    @staticmethod
+    def _apply_rotation(img, page_data):
+        if page_data['rotation'] != 0:
+            return img.rotate(page_data['rotation'], expand=True)
+        return img
+
+    @staticmethod
+    def _apply_flip(img, page_data):
+        if page_data['flip_h']:
+            img = ImageOps.mirror(img)
+        if page_data['flip_v']:
+            img = ImageOps.flip(img)
+        return img
+
+    @staticmethod
+    def _apply_grayscale(img, page_data):
+        if page_data['grayscale']:
+            # Grayscale implies a B&W document, transparency is dropped.
+            # Stays single-channel until the tone stage so its LUT touches 1/3 of the data.
+            return img.convert("L")
+        # Only convert to RGB if it's NOT RGBA (to preserve transparency)
+        if img.mode != "RGB" and img.mode != "RGBA":
+            return img.convert("RGB")
+        return img
+
+    @staticmethod
+    def _apply_tone(img, page_data):
+        """Brightness + contrast as a single lookup-table pass (alpha passes through untouched)."""
+        brightness, contrast = page_data['brightness'], page_data['contrast']
+        if brightness != 1.0 or contrast != 1.0:
+            img = img.point(EditPipeline.tone_table(img, brightness, contrast))
+        if img.mode == "L":
+            img = img.convert("RGB")
+        return img
+
+    @staticmethod
+    def tone_table(img, brightness, contrast):
+        """
+        Builds the fused point-operation table for an L, RGB or RGBA image.
+
+        Matches ImageEnhance.Brightness followed by ImageEnhance.Contrast:
+        brightness scales towards black, contrast scales around the mean
+        luminance of the brightened image. That mean is derived from the
+        histogram of the input, so the brightened image is never materialized.
+        """
+        values = np.arange(256, dtype=np.float32)
+        # Same float32 blend + truncation as Pillow's ImagingBlend
+        bright = np.clip(values * np.float32(brightness), 0, 255).astype(np.uint8)
+
+        lut = bright
+        if contrast != 1.0:
+            hist = np.asarray(img.histogram(), dtype=np.float64)
+            if img.mode == "L":
+                weights = (1.0,)
+            else:
+                # ITU-R 601-2 luma, as used by convert("L")
+                weights = (0.299, 0.587, 0.114)
+            total = hist[:256].sum()
+            luma = 0.0
+            for band, weight in enumerate(weights):
+                luma += weight * (hist[band * 256:(band + 1) * 256] @ bright) / total
+            mean = np.float32(int(luma + 0.5))
+            lut = np.clip(mean + np.float32(contrast) * (bright.astype(np.float32) - mean), 0, 255).astype(np.uint8)
+
+        table = lut.tolist()
+        if img.mode == "L":
+            return table
+        table = table * 3
+        if img.mode == "RGBA":
+            table += list(range(256))  # Identity for alpha
+        return table
@@ -0,0 +1,49 @@
+from PIL import Image
+
+
+class ImagePyramid:
+    """
+    Resolution pyramid (mipmaps) of a rendered page.
+
+    Level 0 is the full image itself (shared, not copied), every next level
+    halves both dimensions until the short side would drop below MIN_SIZE.
+    Zoomed views, thumbnails and AI uploads resample the nearest larger
+    level instead of the full-resolution page.
+    """
+
+    MIN_SIZE = 64
+
+    def __init__(self, pil_image):
+        self.levels = [pil_image]
+        img = pil_image
+        while min(img.size) // 2 >= self.MIN_SIZE:
+            # 2x2 box reduction of the previous level, much cheaper than resampling the original
+            img = img.reduce(2)
+            self.levels.append(img)
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def level_for(self, scale):
+        """Returns (image, level_scale) of the smallest level that is still at least `scale` of the full size"""
+        full_w = self.levels[0].width
+        for img in reversed(self.levels):
+            level_scale = img.width / full_w
+            if level_scale >= scale:
+                return img, level_scale
+        return self.levels[0], 1.0
+
+    def resample(self, size, resample=Image.Resampling.LANCZOS):
+        """Returns the page resized to size, resampled from the nearest larger level"""
+        w, h = self.size
+        img, _ = self.level_for(max(size[0] / w, size[1] / h))
+        if img.size == tuple(size):
+            return img
+        return img.resize(size, resample)
+
+    def fit(self, max_size, resample=Image.Resampling.LANCZOS):
+        """Like Image.thumbnail: largest size within max_size keeping the aspect ratio, never upscaled"""
+        w, h = self.size
+        ratio = min(max_size[0] / w, max_size[1] / h, 1.0)
+        return self.resample((max(1, round(w * ratio)), max(1, round(h * ratio))), resample)
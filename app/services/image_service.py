@@ -1,70 +1,34 @@
-from PIL import Image, ImageEnhance, ImageOps
+import threading
+
+from PIL import Image
 import numpy as np
 
+from app.services.edit_pipeline import EditPipeline
+from app.services.page_bitmap import PageBitmap
+
 class ImageProcessor:
     @staticmethod
     def process_page(page_data):
         """
         Applies all edits from page_data to the original image.
-        Returns the processed PIL Image.
-        """
-        img = page_data['original'].copy()
-
-        # Preserve Alpha if present
-        has_alpha = img.mode == 'RGBA'
-
-        # 1. Rotation
-        if page_data['rotation'] != 0:
-            img = img.rotate(page_data['rotation'], expand=True)
-
-        # 2. Flips
-        if page_data['flip_h']:
-            img = ImageOps.mirror(img)
-        if page_data['flip_v']:
-            img = ImageOps.flip(img)
-
-        # 3. Grayscale
-        if page_data['grayscale']:
-            img = img.convert("L") # Auto drops alpha
-            if has_alpha:
-                 # If we want grayscale + alpha, we need a different approach, 
-                 # but usually grayscale implies B&W document. 
-                 # Let's keep it simple: Grayscale kills transparency or we convert back to simple RGB.
-                 pass
-            img = img.convert("RGB") 
-        else:
-            # Only convert to RGB if it's NOT RGBA (to preserve transparency)
-            if img.mode != "RGB" and img.mode != "RGBA":
-                img = img.convert("RGB")
-
-        # 4. Brightness
-        if page_data['brightness'] != 1.0:
-            if img.mode == 'RGBA':
-                # Split alpha, enhance RGB, merge back
-                r, g, b, a = img.split()
-                rgb_img = Image.merge('RGB', (r, g, b))
-                enhancer = ImageEnhance.Brightness(rgb_img)
-                rgb_img = enhancer.enhance(page_data['brightness'])
-                r, g, b = rgb_img.split()
-                img = Image.merge('RGBA', (r, g, b, a))
-            else:
-                enhancer = ImageEnhance.Brightness(img)
-                img = enhancer.enhance(page_data['brightness'])
+        Uses the page's cached EditPipeline when present so unchanged stages are reused.
+        Returns the processed PIL Image (shared with the cache, do not modify in place).
+        """
+        pipeline = page_data.get('pipeline')
+        if pipeline is None:
+            pipeline = EditPipeline()
+        return pipeline.render(page_data)
 
-        # 5. Contrast
-        if page_data['contrast'] != 1.0:
-            if img.mode == 'RGBA':
-                r, g, b, a = img.split()
-                rgb_img = Image.merge('RGB', (r, g, b))
-                enhancer = ImageEnhance.Contrast(rgb_img)
-                rgb_img = enhancer.enhance(page_data['contrast'])
-                r, g, b = rgb_img.split()
-                img = Image.merge('RGBA', (r, g, b, a))
-            else:
-                enhancer = ImageEnhance.Contrast(img)
-                img = enhancer.enhance(page_data['contrast'])
-            
-        return img
+    @staticmethod
+    def make_thumbnail(pil_image, size):
+        """
+        Returns a downscaled copy that fits in size, like Image.thumbnail,
+        without first copying the full-resolution image.
+        """
+        w, h = pil_image.size
+        ratio = min(size[0] / w, size[1] / h, 1.0)
+        new_size = (max(1, round(w * ratio)), max(1, round(h * ratio)))
+        return pil_image.resize(new_size, Image.Resampling.BICUBIC, reducing_gap=2.0)
 
     @staticmethod
     def remove_white_background(pil_image, threshold=230):
@@ -188,7 +152,7 @@ class ImageProcessor:
         resized = []
         for img in rgb_images:
             # Resize maintaining aspect ratio
-            img_copy = img.copy()
+            img_copy = PageBitmap.share(img)
             img_copy.thumbnail((cell_w, cell_h), Image.Resampling.LANCZOS)
             
             # Create cell with background color
@@ -217,11 +181,32 @@ class ImageProcessor:
         
         return grid
 
+    ANALYSIS_SIZE = 1600  # Longest side of the proxy page geometry is detected on
+
+    @staticmethod
+    def _analysis_proxy(img_array, size=None):
+        """
+        Grayscale proxy of an image array, at most size px (default
+        ANALYSIS_SIZE), for geometry detection. Returns (proxy, scale); proxy
+        coordinates divided by scale are full-resolution coordinates.
+        """
+        import cv2
+        h, w = img_array.shape[:2]
+        scale = min(1.0, (size or ImageProcessor.ANALYSIS_SIZE) / max(h, w))
+        if scale < 1.0:
+            img_array = cv2.resize(img_array, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                   interpolation=cv2.INTER_AREA)
+        if img_array.ndim == 3:
+            code = cv2.COLOR_RGBA2GRAY if img_array.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+            img_array = cv2.cvtColor(img_array, code)
+        return img_array, scale
+
     @staticmethod
     def deskew_image(pil_image):
         """
         Automatically detects and corrects the skew/tilt of an image.
         Uses contour detection and minimum area rectangle for high accuracy.
+        The angle is found on an analysis proxy, only the rotation runs at full resolution.
         
         Args:
             pil_image: PIL Image to deskew
@@ -232,13 +217,10 @@ class ImageProcessor:
         import cv2
         
         # Convert PIL to numpy array
-        img_array = np.array(pil_image)
+        img_array = np.asarray(pil_image)
         
-        # Convert to grayscale
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
+        # Downscaled grayscale copy for the analysis (the angle does not depend on the scale)
+        gray, _ = ImageProcessor._analysis_proxy(img_array)
         
         # Apply Gaussian blur to reduce noise
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -275,8 +257,8 @@ class ImageProcessor:
         if abs(angle) < 0.3:
             return pil_image
         
-        # Get image dimensions
-        h, w = gray.shape
+        # Get full-resolution image dimensions
+        h, w = img_array.shape[:2]
         
         # Calculate rotation matrix
         center = (w // 2, h // 2)
@@ -328,31 +310,70 @@ class ImageProcessor:
         else:
             img = pil_image
         
-        # Try angles from -10 to +10 degrees
-        best_angle = 0
-        best_score = 0
-        
-        for angle in range(-10, 11, 1):
-            # Rotate image
-            rotated = img.rotate(angle, expand=False, fillcolor=255)
-            img_array = np.array(rotated)
-            
-            # Calculate horizontal projection (sum of black pixels per row)
-            projection = np.sum(255 - img_array, axis=1)
-            
-            # Score is variance of projection (higher = more aligned text)
-            score = np.var(projection)
-            
-            if score > best_score:
-                best_score = score
-                best_angle = angle
+        best_angle = ImageProcessor.estimate_skew_angle(img)
         
         # Apply best rotation to original image
-        if best_angle != 0:
+        if abs(best_angle) >= 0.05:
             return pil_image.rotate(best_angle, expand=True, fillcolor='white')
         else:
             return pil_image
 
+    SKEW_COARSE_SIZE = 400  # Longest side of the proxy for the 1 degree sweep
+    SKEW_FINE_SIZE = 1200  # Longest side of the proxy for the 0.1 degree search
+    SKEW_MAX_POINTS = 200000  # Ink pixels used per search, the rest is subsampled
+
+    @staticmethod
+    def estimate_skew_angle(gray, max_angle=10):
+        """
+        Returns the angle (degrees, Image.rotate direction) that makes the text
+        lines of a grayscale PIL image horizontal, using projection profiles.
+        A 1 degree sweep over +-max_angle on a small binary proxy is refined
+        by a 0.1 degree search on a larger one, and by a parabola through the
+        best score and its neighbours.
+        """
+        # Both proxies come from one reduction of the full-resolution page
+        gray = gray.reduce(max(1, max(gray.size) // ImageProcessor.SKEW_FINE_SIZE))
+        xs, ys = ImageProcessor._ink_coordinates(gray, ImageProcessor.SKEW_COARSE_SIZE)
+        if not len(xs): return 0.0
+        angles = np.arange(-max_angle, max_angle + 1, 1.0)
+        coarse = angles[np.argmax(ImageProcessor._projection_scores(xs, ys, angles))]
+
+        xs, ys = ImageProcessor._ink_coordinates(gray, ImageProcessor.SKEW_FINE_SIZE)
+        angles = coarse + np.arange(-10, 11) * 0.1
+        scores = ImageProcessor._projection_scores(xs, ys, angles).astype(np.float64)
+        best = int(np.argmax(scores))
+        if 0 < best < len(angles) - 1:
+            left, mid, right = scores[best - 1:best + 2]
+            curvature = left - 2 * mid + right
+            if curvature < 0:
+                return float(angles[best] + 0.1 * 0.5 * (left - right) / curvature)
+        return float(angles[best])
+
+    @staticmethod
+    def _ink_coordinates(gray, size):
+        """Coordinates (x, y) of the ink pixels of a proxy of at most size px, relative to its centre"""
+        factor = max(1, max(gray.size) // size)
+        proxy = np.asarray(gray.reduce(factor))
+        paper = np.percentile(proxy, 90)
+        ys, xs = np.nonzero(proxy < paper - 40)
+        step = max(1, len(xs) // ImageProcessor.SKEW_MAX_POINTS)
+        # Integer centre: half-pixel coordinates would pair up rows at 0 degrees
+        return xs[::step] - proxy.shape[1] // 2, ys[::step] - proxy.shape[0] // 2
+
+    @staticmethod
+    def _projection_scores(xs, ys, angles):
+        """
+        Projection profile score of the ink pixels rotated by each angle: the
+        sum of squared row counts, higher when the rows follow text lines.
+        All angles are binned with a single bincount.
+        """
+        theta = np.radians(angles)[:, None]
+        rows = np.rint(ys * np.cos(theta) - xs * np.sin(theta)).astype(np.int64)
+        span = int(np.hypot(np.abs(xs).max(), np.abs(ys).max())) * 2 + 3
+        rows += span // 2 + np.arange(len(angles))[:, None] * span
+        counts = np.bincount(rows.ravel(), minlength=len(angles) * span).reshape(len(angles), span)
+        return np.einsum('ij,ij->i', counts, counts)
+
     @staticmethod
     def add_watermark(pil_image, text="COPY", position="center", 
                      opacity=128, rotation=-45, font_size=None, color=(255, 0, 0)):
@@ -373,8 +394,8 @@ class ImageProcessor:
         """
         from PIL import ImageDraw, ImageFont
         
-        # Create a copy to avoid modifying original
-        img = pil_image.copy()
+        # Copy-on-write handle instead of a full copy: the original is never modified
+        img = PageBitmap.share(pil_image)
         
         # Ensure RGB mode
         if img.mode != 'RGB':
@@ -451,7 +472,7 @@ class ImageProcessor:
         Add manual text to the image at specific coordinates.
         """
         from PIL import ImageDraw, ImageFont
-        img = pil_image.copy().convert('RGBA')
+        img = pil_image.convert('RGBA')
         txt_layer = Image.new('RGBA', img.size, (255, 255, 255, 0))
         draw = ImageDraw.Draw(txt_layer)
         
@@ -468,14 +489,15 @@ class ImageProcessor:
         """
         Detects document corners and performs a perspective transform to flatten it.
         Uses OpenCV for contour detection and warping.
+        Corners are detected on an analysis proxy and scaled back for a single full-resolution warp.
         """
         import cv2
-        img = np.array(pil_image.convert('RGB'))
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        img = np.asarray(pil_image.convert('RGB'))
+        gray, scale = ImageProcessor._analysis_proxy(img)
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
         edged = cv2.Canny(blurred, 75, 200)
 
-        contours, _ = cv2.findContours(edged.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(edged, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
         contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
 
         screen_cnt = None
@@ -490,7 +512,7 @@ class ImageProcessor:
             return pil_image  # Could not find document
 
         # Perspective Transform
-        pts = screen_cnt.reshape(4, 2)
+        pts = screen_cnt.reshape(4, 2) / scale
         rect = np.zeros((4, 2), dtype="float32")
         s = pts.sum(axis=1)
         rect[0] = pts[np.argmin(s)]
@@ -503,8 +525,8 @@ class ImageProcessor:
         widthA = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
         widthB = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
         maxWidth = max(int(widthA), int(widthB))
-        heightA = np.sqrt(((tr[1] - br[1]) ** 2) + ((tr[1] - br[1]) ** 2))
-        heightB = np.sqrt(((tl[1] - bl[1]) ** 2) + ((tl[1] - bl[1]) ** 2))
+        heightA = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
+        heightB = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
         maxHeight = max(int(heightA), int(heightB))
 
         dst = np.array([
@@ -514,8 +536,6 @@ class ImageProcessor:
             [0, maxHeight - 1]], dtype="float32")
 
         M = cv2.getPerspectiveTransform(rect, dst)
-        warped = cv2.warpAffine(img, M, (maxWidth, maxHeight)) # Fix: should be warpPerspective
-        # Using warpPerspective instead of warpAffine
         warped = cv2.warpPerspective(img, M, (maxWidth, maxHeight))
 
         return Image.fromarray(warped)
@@ -532,34 +552,107 @@ class ImageProcessor:
                                         cv2.THRESH_BINARY, 11, 2)
         return Image.fromarray(enhanced)
 
+    BLANK_PROXY_SIZE = 512  # Longest side of the analysis proxy
+    BLANK_INK_DELTA = 60  # Pixels this much darker than the paper count as ink
+    BLANK_INK_NOISE = 0.0001  # Ink coverage of dust and scanner noise on a blank page
+    BLANK_EDGE_THRESHOLD = 0.01  # Fraction of strong Laplacian responses a page with content exceeds
+    BLANK_CONFIDENCE = 0.75  # Pages at least this likely blank are dropped
+    BLANK_BORDERLINE = 0.25  # Pages kept with at least this confidence are flagged for review
+
     @staticmethod
-    def detect_blank_page(pil_image, threshold=0.005):
+    def blank_page_confidence(pil_image, threshold=0.002):
+        """
+        Returns how likely the page is blank, from 0.0 (content) to 1.0 (blank).
+        Works on a downsampled uint8 proxy: the ink coverage (share of pixels
+        clearly darker than the paper) decides first and pages well above
+        threshold return 0.0 right away; otherwise edges are counted with a
+        Laplacian. 0.5 means the page sits exactly on the thresholds. Ink below
+        BLANK_INK_NOISE is ignored; any ink above it scores below
+        BLANK_CONFIDENCE, so a page with a single line is flagged, never dropped.
+        """
+        import cv2
+        if pil_image.mode not in ('L', 'RGB'):
+            pil_image = pil_image.convert('RGB')
+        factor = max(1, max(pil_image.size) // ImageProcessor.BLANK_PROXY_SIZE)
+        gray = np.asarray(pil_image.reduce(factor).convert('L'))
+
+        hist = np.bincount(gray.ravel(), minlength=256)
+        # Paper level: the 90th percentile brightness
+        paper = int(np.searchsorted(np.cumsum(hist), 0.9 * gray.size))
+        ink = hist[:max(0, paper - ImageProcessor.BLANK_INK_DELTA)].sum() / gray.size
+        noise = ImageProcessor.BLANK_INK_NOISE
+        if ink <= noise:
+            content = 0.0
+        elif ink < threshold:
+            # Log scale between the noise floor (0.6, confidence 0.7) and threshold (1.0, confidence 0.5)
+            content = 0.6 + 0.4 * np.log(ink / noise) / np.log(threshold / noise)
+        else:
+            content = ink / threshold
+        if content >= 2: return 0.0
+
+        laplacian = np.abs(cv2.Laplacian(gray, cv2.CV_16S))
+        edges = np.count_nonzero(laplacian > 40) / gray.size
+        content = max(content, edges / ImageProcessor.BLANK_EDGE_THRESHOLD)
+        return float(np.clip(1 - content / 2, 0.0, 1.0))
+
+    @staticmethod
+    def detect_blank_page(pil_image, threshold=0.002):
         """
         Returns True if the page is likely blank.
-        Uses Laplacian variance or basic edge counting.
+        See blank_page_confidence.
+        """
+        return ImageProcessor.blank_page_confidence(pil_image, threshold) >= ImageProcessor.BLANK_CONFIDENCE
+
+    FACE_DETECT_SIZE = 1600  # Longest side of the proxy faces are detected on
+    _face_cascade = None  # Shared detector, the Haar XML is parsed once per process
+    _face_lock = threading.Lock()
+
+    @staticmethod
+    def detect_faces(pil_image):
+        """
+        Returns the face rectangles (x, y, w, h) of an image in full-resolution
+        coordinates. Detection runs on a grayscale proxy of at most
+        FACE_DETECT_SIZE px with the shared cascade classifier.
         """
         import cv2
-        img = np.array(pil_image.convert('L'))
-        laplacian_var = cv2.Laplacian(img, cv2.CV_64F).var()
-        # High variance means lots of details (edges), low variance means blank/blurry.
-        # Usually variance < 100 for blank pages
-        return laplacian_var < 100
+        gray, scale = ImageProcessor._analysis_proxy(np.asarray(pil_image.convert('RGB')),
+                                                     ImageProcessor.FACE_DETECT_SIZE)
+        with ImageProcessor._face_lock:
+            if ImageProcessor._face_cascade is None:
+                ImageProcessor._face_cascade = cv2.CascadeClassifier(
+                    cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            faces = ImageProcessor._face_cascade.detectMultiScale(gray, 1.1, 4)
+
+        w, h = pil_image.size
+        rects = []
+        for (x, y, fw, fh) in faces:
+            x0, y0 = int(x / scale), int(y / scale)
+            x1, y1 = min(w, int(np.ceil((x + fw) / scale))), min(h, int(np.ceil((y + fh) / scale)))
+            rects.append((x0, y0, x1 - x0, y1 - y0))
+        return rects
 
     @staticmethod
-    def redact_faces(pil_image):
+    def redact_faces(pil_image, mode="blur"):
         """
         Automatically detects and blurs faces in the image.
+        The strength follows the face size: the Gaussian kernel is a third of
+        the face, mode="pixelate" uses blocks of an eighth of the face.
         """
         import cv2
+        faces = ImageProcessor.detect_faces(pil_image)
+        if not len(faces): return pil_image
         img = np.array(pil_image.convert('RGB'))
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
 
         for (x, y, w, h) in faces:
             sub_face = img[y:y+h, x:x+w]
-            # Blur the face
-            sub_face = cv2.GaussianBlur(sub_face, (99, 99), 30)
+            if mode == "pixelate":
+                block = max(2, max(w, h) // 8)
+                small = cv2.resize(sub_face, (max(1, w // block), max(1, h // block)), interpolation=cv2.INTER_AREA)
+                sub_face = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+            else:
+                # Blur the face
+                k = max(3, (max(w, h) // 3) | 1)
+                sub_face = cv2.GaussianBlur(sub_face, (k, k), k / 3)
             img[y:y+h, x:x+w] = sub_face
             
         return Image.fromarray(img)
@@ -0,0 +1,90 @@
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from PIL import Image
+
+from app.services.page_store import image_bytes
+
+
+class CopyMeter:
+    """
+    Counts the bytes of page pixels copied through PageBitmap handles (other
+    copies, e.g. numpy conversions, are not seen), attributed to the action in
+    progress on the copying thread (see action() / metered). Copies made on a
+    thread with no action running, such as background renders, are not
+    charged to any action. Finished actions are kept in history.
+    """
+
+    def __init__(self, history_size=50):
+        self.history = deque(maxlen=history_size)  # (action, bytes copied)
+        self._local = threading.local()  # Per-thread action name and bytes
+        self._lock = threading.Lock()
+
+    def add(self, nbytes):
+        if getattr(self._local, 'action', None) is not None:
+            self._local.bytes += nbytes
+
+    @property
+    def last(self):
+        return self.history[-1] if self.history else (None, 0)
+
+    @contextmanager
+    def action(self, name):
+        local = self._local
+        # Nested actions (e.g. reset_edits inside perform_crop) count towards the outer one
+        outer = getattr(local, 'action', None) is None
+        if outer:
+            local.action, local.bytes = name, 0
+        try:
+            yield
+        finally:
+            if outer:
+                with self._lock:
+                    self.history.append((local.action, local.bytes))
+                local.action = None
+
+
+copy_meter = CopyMeter()
+
+
+def metered(fn):
+    """Decorator: reports the pixel copies made while fn runs to copy_meter, under fn's name"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with copy_meter.action(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class PageBitmap(Image.Image):
+    """
+    Copy-on-write handle to a page image.
+
+    share() returns a new image object referencing the same pixel buffer, which
+    stays alive as long as any handle does. Both handles are marked read-only,
+    so Pillow duplicates the buffer only when one of them is actually modified
+    in place (paste, ImageDraw, putpixel...); the others keep the old pixels.
+    Operations returning new images (resize, rotate, convert...) never copy.
+    Copies made through a PageBitmap are reported to copy_meter.
+    """
+
+    @classmethod
+    def share(cls, pil_image):
+        pil_image.load()
+        bitmap = pil_image._new(pil_image.im)
+        bitmap.__class__ = cls
+        bitmap.readonly = 1
+        # The source must not write into the shared buffer either
+        pil_image.readonly = 1
+        return bitmap
+
+    def _copy(self):
+        # Deferred copy on first in-place modification
+        copy_meter.add(image_bytes(self))
+        super()._copy()
+
+    def copy(self):
+        copy_meter.add(image_bytes(self))
+        return super().copy()
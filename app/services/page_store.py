@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from PIL import Image
+
+
+def image_bytes(pil_image):
+    """Approximate in-memory size of a PIL image."""
+    return pil_image.width * pil_image.height * len(pil_image.getbands())
+
+
+class PageData(dict):
+    """
+    Page dictionary whose bitmaps may be spilled to disk by a PageStore.
+
+    Behaves like the plain page dict; reading 'original' of a spilled page
+    transparently reloads it, derived images ('processed', pyramid, pipeline
+    caches) are simply re-rendered from it on demand.
+    """
+
+    def __init__(self, store, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+        self.spill_path = None  # On-disk copy of 'original', valid while it is unchanged
+        self.spilled = False
+        self.spill_id = uuid.uuid4().hex
+        self.original_revision = 0  # Increases whenever 'original' is replaced (not when reloaded)
+        store.add(self)
+
+    def __getitem__(self, key):
+        if key == 'original':
+            # Check, reload and read together: another thread must not spill the page in between
+            with self.store._lock:
+                if self.spilled:
+                    self.store.load(self)
+                return super().__getitem__(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if key == 'original':
+            # A new original makes the on-disk copy stale
+            self.store.discard_file(self)
+            self.spilled = False
+            self.original_revision += 1
+        super().__setitem__(key, value)
+
+    def resident_bytes(self):
+        """Bytes held by this page's original, processed image, pyramid and pipeline intermediates."""
+        if self.spilled:
+            return 0
+        seen = {}
+        for img in (self.get('original'), self.get('processed')):
+            if img is not None:
+                seen[id(img)] = img
+        pyramid = self.get('pyramid')
+        if pyramid is not None:
+            for img in pyramid[1].levels:
+                seen[id(img)] = img
+        for key in ('pipeline', 'preview_pipeline'):
+            pipeline = self.get(key)
+            if pipeline is not None:
+                for img in pipeline.images():
+                    seen[id(img)] = img
+        return sum(image_bytes(img) for img in seen.values())
+
+
+class PageStore:
+    """
+    Keeps page bitmaps within a memory budget.
+
+    Pages are tracked in least-recently-used order; when the resident bytes
+    exceed the budget, the oldest pages are spilled: their original is
+    written zlib-compressed to spill_dir (once, while it stays unchanged)
+    and all of their full-size bitmaps are dropped from RAM. spill_dir is a
+    fresh directory of this store under spill_root, so several running
+    instances never touch each other's files; close() removes it.
+
+    Only the thread that created the store (the UI thread) spills; pages
+    reloaded by worker threads (export, batch processing) are accounted for
+    at the UI thread's next touch. Pages inside pinned() are never spilled.
+    """
+
+    def __init__(self, spill_root, budget_bytes=1024 * 1024 * 1024):
+        os.makedirs(spill_root, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix="session-", dir=spill_root)
+        self.budget_bytes = budget_bytes
+        self._pages = OrderedDict()  # id -> weakref to PageData, oldest first
+        self._pins = {}  # id -> number of pinned() blocks using the page
+        self._owner = threading.get_ident()  # The only thread allowed to spill
+        self._lock = threading.RLock()
+
+    def close(self):
+        """Removes this store's spill directory; spilled pages cannot be reloaded afterwards"""
+        with self._lock:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def add(self, page):
+        with self._lock:
+            key = id(page)
+            path = self._spill_path(page)
+            # Removed pages are forgotten (and their spill file deleted) once garbage collected
+            self._pages[key] = weakref.ref(page, lambda ref, k=key, p=path: self._on_page_freed(k, p))
+
+    def _on_page_freed(self, key, path):
+        with self._lock:
+            self._pages.pop(key, None)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _spill_path(self, page):
+        return os.path.join(self.spill_dir, f"{page.spill_id}.page")
+
+    def touch(self, page):
+        """Marks a page as most recently used and spills older pages if over budget"""
+        with self._lock:
+            key = id(page)
+            if key in self._pages:
+                self._pages.move_to_end(key)
+            self.enforce_budget(keep=page)
+
+    @contextmanager
+    def pinned(self, page):
+        """Keeps a page in memory while the block runs (e.g. while a worker snapshots it)"""
+        key = id(page)
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield page
+        finally:
+            with self._lock:
+                if self._pins[key] == 1:
+                    del self._pins[key]
+                else:
+                    self._pins[key] -= 1
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(p.resident_bytes() for p in self._live_pages())
+
+    def _live_pages(self):
+        return [p for p in (ref() for ref in self._pages.values()) if p is not None]
+
+    def enforce_budget(self, keep=None):
+        if threading.get_ident() != self._owner: return
+        with self._lock:
+            pages = self._live_pages()
+            total = sum(p.resident_bytes() for p in pages)
+            for page in pages:  # Oldest first
+                if total <= self.budget_bytes:
+                    break
+                if page is keep or page.spilled or id(page) in self._pins:
+                    continue
+                total -= page.resident_bytes()
+                self.spill(page)
+
+    def spill(self, page):
+        """Writes the page's original to disk (if needed) and drops its bitmaps from memory"""
+        with self._lock:
+            original = dict.get(page, 'original')
+            if original is None or page.spilled:
+                return
+            if page.spill_path is None:
+                path = self._spill_path(page)
+                header = f"{original.mode} {original.width} {original.height}\n".encode("ascii")
+                with open(path, "wb") as f:
+                    f.write(header)
+                    f.write(zlib.compress(original.tobytes(), 1))
+                page.spill_path = path
+
+            dict.__setitem__(page, 'original', None)
+            dict.__setitem__(page, 'processed', None)
+            dict.__setitem__(page, 'pyramid', None)
+            for key in ('pipeline', 'preview_pipeline'):
+                if dict.get(page, key) is not None:
+                    dict.__getitem__(page, key).invalidate()
+            page.spilled = True
+
+    def load(self, page):
+        """
+        Reads a spilled page's original back into memory. A missing or
+        corrupt spill file leaves a blank page of the same size (1x1 if even
+        the header is unreadable) instead of raising in the caller.
+        """
+        with self._lock:
+            if not page.spilled:
+                return
+            mode, size = "RGB", (1, 1)
+            try:
+                with open(page.spill_path, "rb") as f:
+                    mode, width, height = f.readline().decode("ascii").split()
+                    size = (int(width), int(height))
+                    data = zlib.decompress(f.read())
+                original = Image.frombytes(mode, size, data)
+            except (OSError, ValueError, zlib.error) as e:
+                print(f"Spilled page could not be reloaded: {e}")
+                try:
+                    original = Image.new(mode, size, "white")
+                except ValueError:
+                    original = Image.new("RGB", (1, 1), "white")
+                self.discard_file(page)
+            dict.__setitem__(page, 'original', original)
+            page.spilled = False
+        # Make room for it
+        self.touch(page)
+
+    def discard_file(self, page):
+        with self._lock:
+            if page.spill_path and os.path.exists(page.spill_path):
+                try:
+                    os.remove(page.spill_path)
+                except OSError:
+                    pass
+            page.spill_path = None
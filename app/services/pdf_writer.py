@@ -0,0 +1,354 @@
+import io
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, PdfParser, features
+
+from app.services.edit_pipeline import EditPipeline
+from app.services.worker_pool import ordered_map
+
+# Page classes of the automatic compression profiles
+BILEVEL, GRAYSCALE, COLOR = "bilevel", "grayscale", "color"
+
+FILTER_NAMES = {"CCITTFaxDecode": "CCITT G4", "FlateDecode": "Flate", "DCTDecode": "JPEG"}
+
+# Classification runs on a nearest-neighbour sample of this size (exact pixel values, no blending)
+CLASSIFY_SIZE = 1024
+
+# Share of mid-tone pixels a BILEVEL page may have. Bilevel pages are thresholded,
+# so faint content (pencil, light stamps) must keep the page GRAYSCALE
+BILEVEL_TOLERANCE = 0.0002
+
+# Share of coloured pixels a GRAYSCALE / BILEVEL page may have: only stray noise.
+# A signature or stamp covers far more than this and keeps the page COLOR
+COLOR_TOLERANCE = 0.0002
+
+
+def classify_page(pil_image, tolerance=COLOR_TOLERANCE):
+    """
+    Returns BILEVEL (black and white only, e.g. enhance_document_text output),
+    GRAYSCALE or COLOR. At most `tolerance` of the sampled pixels may be
+    coloured (scanner noise); a bilevel page may have almost no mid-tones
+    (BILEVEL_TOLERANCE).
+    """
+    if pil_image.mode == "1":
+        return BILEVEL
+    ratio = min(1.0, CLASSIFY_SIZE / max(pil_image.size))
+    size = (max(1, round(pil_image.width * ratio)), max(1, round(pil_image.height * ratio)))
+    sample = pil_image.resize(size, Image.Resampling.NEAREST) if ratio < 1.0 else pil_image
+
+    if sample.mode not in ("L", "LA"):
+        rgb = np.asarray(sample.convert("RGB"), dtype=np.int16)
+        chroma = np.max(rgb, axis=2) - np.min(rgb, axis=2)
+        if np.count_nonzero(chroma > 24) > tolerance * chroma.size:
+            return COLOR
+
+    # Bilevel only if (almost) no pixel is between dark and light: the threshold would erase them
+    hist = sample.convert("L").histogram()
+    mid_tones = sum(hist[48:208])
+    return BILEVEL if mid_tones <= BILEVEL_TOLERANCE * sum(hist) else GRAYSCALE
+
+
+def encode_page(pil_image, jpeg_quality=75, profile=None):
+    """
+    Encodes a page image for embedding in a PDF. Without a profile the
+    encodings of Pillow's PDF plugin are used; with a classify_page() profile
+    bilevel pages become 1-bit CCITT G4 (Flate without libtiff), grayscale
+    pages 8-bit gray JPEG and colour pages RGB JPEG.
+    Returns (size, mode, filter, stream): plain data, so pages can be encoded
+    in worker processes.
+    """
+    if profile == BILEVEL and pil_image.mode != "1":
+        # Plain threshold, convert("1") would dither
+        pil_image = pil_image.convert("L").point(lambda v: 255 if v >= 128 else 0, "1")
+    elif profile == GRAYSCALE and pil_image.mode != "L":
+        pil_image = pil_image.convert("L")
+    elif profile == COLOR and pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+
+    if pil_image.mode not in ("1", "L", "RGB", "CMYK"):
+        pil_image = pil_image.convert("RGB")
+    width, height = pil_image.size
+    op = io.BytesIO()
+
+    if pil_image.mode == "1" and features.check("libtiff"):
+        pil_image.save(op, "TIFF", compression="group4", strip_size=math.ceil(width / 8) * height)
+        # Skip the 8-byte TIFF header, the strip follows it
+        return pil_image.size, "1", "CCITTFaxDecode", op.getvalue()[8:]
+
+    if pil_image.mode == "1":
+        if profile == BILEVEL:
+            # Packed rows, 1 = white as in DeviceGray
+            return pil_image.size, "1", "FlateDecode", zlib.compress(pil_image.tobytes(), 6)
+        pil_image = pil_image.convert("L")
+    pil_image.save(op, "JPEG", quality=jpeg_quality)
+    return pil_image.size, pil_image.mode, "DCTDecode", op.getvalue()
+
+
+def render_and_encode(snapshot, jpeg_quality=75, profiles=False):
+    """
+    Renders an EditPipeline.snapshot() and encodes it (worker process entry point).
+    Returns (encoded page, profile); profile is None unless profiles is set.
+    """
+    img = EditPipeline().render(snapshot)
+    profile = classify_page(img) if profiles else None
+    return encode_page(img, jpeg_quality, profile), profile
+
+
+class PdfWriter:
+    """
+    Writes a multi-page image PDF one page at a time.
+
+    add_page() encodes a page and appends its objects to the file right away,
+    so only the page being written is held in memory (unlike Pillow's
+    save_all, which needs every page up front). add_encoded() takes a page
+    already encoded by encode_page(), e.g. in another process. close() writes
+    the page tree and the cross-reference table; abort() removes the
+    unfinished file.
+
+    With incremental=True every page is followed by a checkpoint(): an
+    incremental update (page tree + xref section + trailer) that leaves a
+    complete, readable PDF on disk, so a crash loses at most the page being
+    written. close() then finalizes a single xref table covering all objects.
+    """
+
+    def __init__(self, path, resolution=72.0, jpeg_quality=75, profiles=False, incremental=False):
+        self.path = path
+        self.resolution = resolution
+        self.jpeg_quality = jpeg_quality
+        self.profiles = profiles  # Per-page compression profiles (see classify_page)
+        self.incremental = incremental
+        self._file = open(path, "w+b")
+        self._closed = False
+        self._checkpointed = 0  # Pages covered by the last checkpoint
+        self._pdf = PdfParser.PdfParser(f=self._file, mode="w+b")
+        self._pdf.start_writing()
+        self._pdf.write_header()
+        self._pdf.write_comment("created by InerScan")
+        # Catalog and page tree are written last, once all pages are known
+        self._pdf.root_ref = self._pdf.next_object_id(0)
+        self._pdf.pages_ref = self._pdf.next_object_id(0)
+        self._pdf.info["Title"] = os.path.splitext(os.path.basename(path))[0]
+        self._pdf.info["CreationDate"] = self._pdf.info["ModDate"] = time.gmtime()
+
+    @property
+    def page_count(self):
+        return len(self._pdf.pages)
+
+    def add_page(self, pil_image):
+        profile = classify_page(pil_image) if self.profiles else None
+        self.add_encoded(encode_page(pil_image, self.jpeg_quality, profile))
+
+    def add_encoded(self, encoded):
+        pdf = self._pdf
+        (width, height), mode, decode_filter, stream = encoded
+        image_ref = pdf.write_obj(None, stream=stream, Type=PdfParser.PdfName("XObject"),
+                                  Subtype=PdfParser.PdfName("Image"), Width=width, Height=height,
+                                  **self._image_dict(mode, decode_filter, width, height))
+
+        w = width * 72.0 / self.resolution
+        h = height * 72.0 / self.resolution
+        contents_ref = pdf.write_obj(None, stream=b"q %f 0 0 %f 0 0 cm /image Do Q\n" % (w, h))
+        procset = "ImageB" if mode in ("1", "L") else "ImageC"
+        page_ref = pdf.write_page(
+            None,
+            Resources=PdfParser.PdfDict(
+                ProcSet=[PdfParser.PdfName("PDF"), PdfParser.PdfName(procset)],
+                XObject=PdfParser.PdfDict(image=image_ref),
+            ),
+            MediaBox=[0, 0, w, h],
+            Contents=contents_ref,
+        )
+        pdf.pages.append(page_ref)
+        if self.incremental:
+            self.checkpoint()
+        else:
+            self._file.flush()
+
+    @staticmethod
+    def _image_dict(mode, decode_filter, width, height):
+        """Image XObject entries describing an encode_page() stream"""
+        if decode_filter == "FlateDecode":
+            return {"Filter": PdfParser.PdfName(decode_filter), "BitsPerComponent": 1,
+                    "ColorSpace": PdfParser.PdfName("DeviceGray")}
+        if decode_filter == "CCITTFaxDecode":
+            params = PdfParser.PdfDict(K=-1, BlackIs1=True, Columns=width, Rows=height)
+            return {
+                "Filter": PdfParser.PdfArray([PdfParser.PdfName(decode_filter)]),
+                "DecodeParms": PdfParser.PdfArray([params]),
+                "BitsPerComponent": 1,
+                "ColorSpace": PdfParser.PdfName("DeviceGray"),
+            }
+        image_dict = {"Filter": PdfParser.PdfName(decode_filter), "BitsPerComponent": 8}
+        if mode == "L":
+            image_dict["ColorSpace"] = PdfParser.PdfName("DeviceGray")
+        elif mode == "CMYK":
+            image_dict["ColorSpace"] = PdfParser.PdfName("DeviceCMYK")
+            image_dict["Decode"] = [1, 0, 1, 0, 1, 0, 1, 0]
+        else:
+            image_dict["ColorSpace"] = PdfParser.PdfName("DeviceRGB")
+        return image_dict
+
+    def _write_trailer(self):
+        """Writes the catalog, the page tree and an xref section for the objects written since the last one"""
+        pdf = self._pdf
+        pdf.write_obj(pdf.root_ref, Type=PdfParser.PdfName("Catalog"), Pages=pdf.pages_ref)
+        pdf.write_obj(pdf.pages_ref, Type=PdfParser.PdfName("Pages"), Count=len(pdf.pages), Kids=pdf.pages)
+        pdf.write_xref_and_trailer()
+        self._checkpointed = len(pdf.pages)
+
+    def checkpoint(self):
+        """Makes the file on disk a complete PDF of the pages added so far (incremental update)"""
+        self._write_trailer()
+        xref = self._pdf.xref_table
+        # The next section only lists objects written after this one (and points back to it via /Prev)
+        xref.existing_entries.update(xref.new_entries)
+        xref.new_entries.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """Writes the page tree, cross-reference table and trailer"""
+        if self._closed: return
+        self._closed = True
+        pdf = self._pdf
+        if pdf.last_xref_section_offset is not None:
+            # After checkpoints: finalize one xref table covering every object, without /Prev
+            xref = pdf.xref_table
+            xref.new_entries.update(xref.existing_entries)
+            xref.existing_entries.clear()
+            pdf.last_xref_section_offset = None
+        self._write_trailer()
+        self._file.flush()
+        pdf.close()
+        self._file.close()
+
+    def abort(self):
+        """Closes and deletes the unfinished file"""
+        if self._closed: return
+        self._closed = True
+        self._pdf.close()
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ExportCache:
+    """
+    Encoded page streams of previous exports, so preview, print and save of
+    an unchanged document do not render and encode the pages again.
+
+    Entries are keyed by page (PageData.spill_id) and valid while the
+    original revision and edit parameters recorded in the page's snapshot and
+    the encoding options are the same; a changed page is simply re-encoded. Least recently used entries are
+    evicted beyond budget_bytes.
+    """
+
+    def __init__(self, budget_bytes=256 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # page id -> (key, render_and_encode() result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(snap, options):
+        """Key of an EditPipeline.snapshot(), so an entry always describes what was actually encoded"""
+        return (snap['original_revision'], snap['edit_hash'], options)
+
+    def get(self, page, key):
+        with self._lock:
+            entry = self._entries.get(page.spill_id)
+            if entry is None or entry[0] != key:
+                return None
+            self._entries.move_to_end(page.spill_id)
+            return entry[1]
+
+    def put(self, page, key, result):
+        with self._lock:
+            old = self._entries.pop(page.spill_id, None)
+            if old is not None:
+                self._bytes -= len(old[1][0][3])
+            self._entries[page.spill_id] = (key, result)
+            self._bytes += len(result[0][3])
+            while self._bytes > self.budget_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0][3])
+
+
+def encoded_pages(pages, snapshot, workers=1, jpeg_quality=75, profiles=False, cache=None):
+    """
+    Yields the render_and_encode() result of every page, in page order;
+    snapshot(page) returns the page's EditPipeline.snapshot().
+    With workers > 1 pages are rendered and encoded in a process pool (see
+    ordered_map). Pages found in the ExportCache are neither rendered nor encoded.
+    """
+    options = (jpeg_quality, profiles)
+
+    def jobs():
+        for page in pages:
+            # One snapshot per page: the cache key describes exactly what is rendered
+            snap = snapshot(page)
+            key = cache.key(snap, options) if cache is not None else None
+            cached = cache.get(page, key) if cache is not None else None
+            args = (snap, jpeg_quality, profiles) if cached is None else None
+            yield (page, key, cached), args
+
+    results = ordered_map(render_and_encode, jobs(), workers)
+    try:
+        for (page, key, cached), result, error in results:
+            if error is not None:
+                raise error
+            if cached is not None:
+                result = cached
+            elif cache is not None:
+                cache.put(page, key, result)
+            yield result
+    finally:
+        results.close()
+
+
+def write_pdf(path, pages, snapshot, progress=None, cancel_event=None, workers=1,
+              jpeg_quality=75, profiles=False, cache=None):
+    """
+    Streams pages into a PDF at path. snapshot(page) returns the page's
+    EditPipeline.snapshot(); pages are rendered and encoded by `workers`
+    processes (1: on this thread) and written in page order. With profiles
+    every page gets the encoding of its classify_page() class; with an
+    ExportCache unchanged pages reuse the streams of an earlier export.
+    progress(done, total) is called after every page.
+    Returns the export summary, one (profile, encoding, bytes) per page, or
+    None if cancel_event was set (the partial file is removed).
+    """
+    total = len(pages)
+    workers = max(1, min(workers, total))
+    summary = []
+    with PdfWriter(path, jpeg_quality=jpeg_quality, profiles=profiles) as writer:
+        results = encoded_pages(pages, snapshot, workers, jpeg_quality, profiles, cache)
+        try:
+            for i, (encoded, profile) in enumerate(results):
+                if cancel_event is not None and cancel_event.is_set():
+                    writer.abort()
+                    return None
+                writer.add_encoded(encoded)
+                summary.append((profile, FILTER_NAMES.get(encoded[2], encoded[2]), len(encoded[3])))
+                if progress:
+                    progress(i + 1, total)
+        finally:
+            results.close()
+    return summary
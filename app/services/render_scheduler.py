@@ -0,0 +1,118 @@
+import threading
+import time
+
+
+class RenderStats:
+    """Time-to-preview counters (milliseconds) collected by the RenderScheduler."""
+
+    def __init__(self):
+        self.count = 0
+        self.dropped = 0
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def record(self, ms):
+        self.count += 1
+        self.last_ms = ms
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+
+class RenderScheduler:
+    """
+    Single background render worker.
+
+    Requests are keyed (e.g. per page): submitting a new request for a key
+    replaces the pending one, so a slider drag coalesces into a handful of
+    renders. A request waits for `debounce` seconds without newer ones, but
+    never longer than `max_wait` after the first one of a burst, so a
+    continuous drag still renders its latest value every max_wait seconds. Results are handed to `post` (typically `lambda fn: app.after(0, fn)`)
+    and only delivered if no newer request for the same key was made meanwhile.
+    """
+
+    def __init__(self, post, debounce=0.03, max_wait=0.1):
+        self.post = post
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.stats = RenderStats()
+        self._pending = {}  # key -> request dict
+        self._latest = {}   # key -> sequence number of the newest request
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, key, render_fn, callback):
+        """
+        Queues render_fn() for key, dropping any request still pending for it.
+        callback(result) runs through `post` once the render is done.
+        """
+        now = time.perf_counter()
+        with self._cond:
+            self._seq += 1
+            previous = self._pending.get(key)
+            if previous is not None:
+                self.stats.dropped += 1
+            self._pending[key] = {
+                'seq': self._seq,
+                'render': render_fn,
+                'callback': callback,
+                # Latency is measured from the first edit that is still waiting
+                'first_submitted': previous['first_submitted'] if previous else now,
+                'submitted': now,
+            }
+            self._latest[key] = self._seq
+            self._cond.notify()
+
+    def cancel(self, key):
+        """Drops the pending request for key and discards any in-flight result."""
+        with self._cond:
+            self._pending.pop(key, None)
+            self._latest.pop(key, None)
+
+    def is_busy(self, key):
+        """True while a request for key is pending, being rendered or waiting to be delivered"""
+        with self._cond:
+            return key in self._pending or key in self._latest
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, request = min(self._pending.items(), key=lambda item: item[1]['submitted'])
+                # Debounce: let a burst of slider ticks settle before rendering,
+                # throttle: a burst that does not settle renders every max_wait
+                deadline = min(request['submitted'] + self.debounce, request['first_submitted'] + self.max_wait)
+                wait = deadline - time.perf_counter()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                del self._pending[key]
+
+            try:
+                result = request['render']()
+            except Exception as e:
+                print(f"Render error: {e}")
+                with self._cond:
+                    # Nothing will be delivered, the key is no longer busy
+                    if self._latest.get(key) == request['seq']:
+                        del self._latest[key]
+                continue
+
+            self.post(lambda k=key, r=request, res=result: self._deliver(k, r, res))
+
+    def _deliver(self, key, request, result):
+        """Runs on the UI thread. Skips results that were superseded or cancelled."""
+        with self._cond:
+            if self._latest.get(key) != request['seq']:
+                self.stats.dropped += 1
+                return
+            del self._latest[key]
+        self.stats.record((time.perf_counter() - request['first_submitted']) * 1000)
+        request['callback'](result)
@@ -0,0 +1,129 @@
+import itertools
+import weakref
+import zlib
+
+from PIL import Image
+
+from app.services.edit_pipeline import EditPipeline
+
+
+class Snapshot:
+    """
+    Pixel snapshot of a replaced original.
+
+    Originals are never modified in place, so a snapshot starts as a shared
+    reference (copy-on-write: no pixels are copied). The journal may later
+    compress it to free memory; image() then decodes a fresh copy.
+    """
+
+    def __init__(self, pil_image):
+        self._image = pil_image
+        self._packed = None  # (mode, size, zlib data)
+
+    @property
+    def compressed(self):
+        return self._packed is not None
+
+    @property
+    def nbytes(self):
+        if self._packed is not None:
+            return len(self._packed[2])
+        return self._image.width * self._image.height * len(self._image.getbands())
+
+    def compress(self):
+        if self._packed is None:
+            self._packed = (self._image.mode, self._image.size, zlib.compress(self._image.tobytes(), 1))
+            self._image = None
+
+    def image(self):
+        if self._packed is not None:
+            mode, size, data = self._packed
+            return Image.frombytes(mode, size, zlib.decompress(data))
+        return self._image
+
+
+class UndoJournal:
+    """
+    Undo/redo history for all pages, bounded by a total memory budget.
+
+    Parameter-only changes (rotate, flip, grayscale, reset...) are recorded
+    as small dicts of edit parameters. Destructive operations (crop,
+    perspective fix, deskew, watermark...) additionally keep a Snapshot of
+    the original they replace. When snapshots exceed the budget the oldest
+    ones are compressed first, then the oldest history entries are dropped.
+    Entries live in each page's 'undo_stack' / 'redo_stack'.
+    """
+
+    ENTRY_BYTES = 256  # Rough cost of a parameter-only record
+
+    def __init__(self, budget_bytes=512 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._seq = itertools.count()
+        self._pages = {}  # id -> weakref to page (page dicts are not hashable)
+
+    def _capture(self, page, destructive):
+        return {
+            'seq': next(self._seq),
+            'params': {k: page[k] for k in EditPipeline.EDIT_KEYS},
+            'snapshot': Snapshot(page['original']) if destructive else None,
+        }
+
+    def record(self, page, destructive=False):
+        """Saves the page state before a change. destructive=True if the change replaces 'original'."""
+        page['undo_stack'].append(self._capture(page, destructive))
+        # A new change invalidates the redo history
+        page['redo_stack'].clear()
+        key = id(page)
+        if key not in self._pages:
+            self._pages[key] = weakref.ref(page, lambda ref, k=key: self._pages.pop(k, None))
+        self.enforce_budget()
+
+    def undo(self, page):
+        """Restores the previous state. Returns False if there is nothing to undo."""
+        return self._step(page, page['undo_stack'], page['redo_stack'])
+
+    def redo(self, page):
+        """Re-applies an undone change. Returns False if there is nothing to redo."""
+        return self._step(page, page['redo_stack'], page['undo_stack'])
+
+    def _step(self, page, source, target):
+        if not source:
+            return False
+        entry = source.pop()
+        # The opposite stack only needs pixels if this step swaps the original
+        target.append(self._capture(page, destructive=entry['snapshot'] is not None))
+        page.update(entry['params'])
+        if entry['snapshot'] is not None:
+            page['original'] = entry['snapshot'].image()
+        self.enforce_budget()
+        return True
+
+    def _entries(self):
+        """All (stack, entry) pairs of live pages"""
+        for page in [ref() for ref in list(self._pages.values())]:
+            if page is None: continue
+            for stack in (page['undo_stack'], page['redo_stack']):
+                for entry in stack:
+                    yield stack, entry
+
+    def memory_bytes(self):
+        total = 0
+        for _, entry in self._entries():
+            total += self.ENTRY_BYTES
+            if entry['snapshot'] is not None:
+                total += entry['snapshot'].nbytes
+        return total
+
+    def enforce_budget(self):
+        while self.memory_bytes() > self.budget_bytes:
+            entries = sorted(self._entries(), key=lambda item: item[1]['seq'])
+            # 1. Compress the oldest uncompressed snapshot
+            pending = [e for _, e in entries if e['snapshot'] is not None and not e['snapshot'].compressed]
+            if pending:
+                pending[0]['snapshot'].compress()
+                continue
+            # 2. Forget the oldest entry; older entries of its stack depend on it, drop them too
+            if not entries:
+                break
+            stack, oldest = entries[0]
+            del stack[:stack.index(oldest) + 1]
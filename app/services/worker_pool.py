@@ -0,0 +1,48 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+def ordered_map(fn, jobs, workers=1):
+    """
+    Runs fn(*args) for every (tag, args) job and yields (tag, result, error),
+    in job order: the result, or the exception the job failed with. A job
+    with args None is already done and yields (tag, None, None).
+
+    With workers > 1 jobs run in a process pool, started on the first job
+    that needs it, with at most 2 * workers jobs in flight; jobs is consumed
+    lazily, so memory stays bounded on long documents. With workers <= 1
+    jobs run on this thread. Closing the generator early cancels the jobs
+    not started yet.
+    """
+    jobs = iter(jobs)
+    pending = deque()  # (tag, Future or finished (result, error))
+    pool = None
+    try:
+        while True:
+            while len(pending) < 2 * workers:
+                job = next(jobs, None)
+                if job is None: break
+                tag, args = job
+                if args is None:
+                    outcome = (None, None)
+                elif workers <= 1:
+                    try:
+                        outcome = (fn(*args), None)
+                    except Exception as e:
+                        outcome = (None, e)
+                else:
+                    if pool is None: pool = ProcessPoolExecutor(max_workers=workers)
+                    outcome = pool.submit(fn, *args)
+                pending.append((tag, outcome))
+            if not pending: return
+
+            tag, outcome = pending.popleft()
+            if isinstance(outcome, Future):
+                try:
+                    outcome = (outcome.result(), None)
+                except Exception as e:
+                    outcome = (None, e)
+            yield (tag,) + outcome
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -3,11 +3,21 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
 import threading
-from PIL import Image, ImageTk, ImageEnhance
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
 
 # Services
 from app.services.scanner_service import ScannerService
 from app.services.image_service import ImageProcessor
+from app.services.edit_pipeline import EditPipeline
+from app.services.render_scheduler import RenderScheduler
+from app.services.image_pyramid import ImagePyramid
+from app.services.page_store import PageStore, PageData
+from app.services.undo_journal import UndoJournal
+from app.services.page_bitmap import PageBitmap, copy_meter, metered
+from app.services.pdf_writer import write_pdf, ExportCache, PdfWriter
+from app.services.batch_pipeline import BatchScanPipeline
+from app.services.batch_processor import PROFILES, PROCESSED, DROPPED, FAILED, run_profile
 from app.services.db_service import DatabaseService
 from app.services.guide_service import GuideService
 from app.services.ai_openai_service import OpenAIService
@@ -19,6 +29,8 @@ from app.ui.widgets.ai_chat_window import AIChatWindow
 from app.ui.widgets.text_result_panel import TextResultPanel
 from app.ui.widgets.sidebar_panels import TextInputPanel, HistoryPanel, HelpPanel
 from app.ui.widgets.animations import LoadingSpinner, ProgressOverlay, ToastNotification, AnimatedProgressBar
+from app.ui.widgets.thumbnail_strip import ThumbnailStrip
+from app.ui.widgets.tiled_view import TiledImageView
 from app.ui.ribbons.scanner_tab import setup_scanner_tab
 from app.ui.ribbons.editor_tab import setup_editor_tab
 
@@ -28,10 +40,34 @@ class ScannerApp(ctk.CTk):
 
         # Services
         self.db_service = DatabaseService()
-        self.scanner_service = ScannerService()
-        self.scanner_service = ScannerService()
+        # "simulator" replays scanner_simulator_source (image folder or multi-page TIFF) instead of WIA
+        self.scanner_service = ScannerService(ScannerService.create_backend(
+            self.db_service.get_setting("scanner_backend", "wia"),
+            self.db_service.get_setting("scanner_simulator_source", ""),
+            float(self.db_service.get_setting("scanner_simulator_rate", 0))))
         self.guide_service = GuideService()
         self.openai_service = OpenAIService(self.db_service)
+        # Page bitmaps beyond the memory budget are spilled to a session dir in the scanner temp dir
+        budget_mb = int(self.db_service.get_setting("page_memory_budget_mb", 1024))
+        self.page_store = PageStore(os.path.join(self.scanner_service.temp_dir, "pages"),
+                                    budget_bytes=budget_mb * 1024 * 1024)
+        # Undo history: parameter records plus snapshots of replaced originals, within its own budget
+        undo_mb = int(self.db_service.get_setting("undo_memory_budget_mb", 512))
+        self.undo_journal = UndoJournal(budget_bytes=undo_mb * 1024 * 1024)
+        # Export render/encode processes (0 = one per CPU core)
+        self.export_workers = int(self.db_service.get_setting("export_workers", 0)) or os.cpu_count() or 1
+        # "auto": per-page compression profile (bilevel / grayscale / color), "standard": same encoding for every page
+        self.pdf_profiles = self.db_service.get_setting("pdf_compression", "auto") == "auto"
+        self.pdf_jpeg_quality = int(self.db_service.get_setting("pdf_jpeg_quality", 75))
+        # Encoded pages shared by preview, print and save; only changed pages are encoded again
+        cache_mb = int(self.db_service.get_setting("export_cache_mb", 256))
+        self.export_cache = ExportCache(budget_bytes=cache_mb * 1024 * 1024)
+        # Privacy blur: "blur" (Gaussian) or "pixelate", strength follows the face size
+        self.privacy_blur_mode = self.db_service.get_setting("privacy_blur_mode", "blur")
+        # Background renderer for editor previews, results are posted back to the Tk thread
+        self.render_scheduler = RenderScheduler(post=lambda fn: self.after(0, fn))
+        # Background builder of page pyramids (zoom levels, thumbnails, AI uploads)
+        self.pyramid_worker = RenderScheduler(post=lambda fn: self.after(0, fn), debounce=0)
 
         default_dir = os.path.join(os.path.expanduser("~"), "Documents", "Scans")
         saved_dir = self.db_service.get_setting("output_dir", default_dir)
@@ -39,6 +75,7 @@ class ScannerApp(ctk.CTk):
 
         self.title("InerScan Pro")
         self.geometry("1400x900")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.configure(fg_color=COLORS["bg_gradient_start"])
 
         # Variables
@@ -51,7 +88,7 @@ class ScannerApp(ctk.CTk):
         self.zoom_level = 1.0
         self.pan_start_x = 0
         self.pan_start_y = 0
-        self.tk_image_ref = None
+        self.commit_job = None
         self.output_dir = tk.StringVar(value=saved_dir)
         self.filename_prefix = tk.StringVar(value=saved_prefix)
         
@@ -64,10 +101,24 @@ class ScannerApp(ctk.CTk):
         self.batch_scanning = False
         self.batch_count = 0
         self.batch_target = 0
-        self.batch_delay = 2000
+        self.batch_skipped = 0
+        self.batch_flagged = 0
+        self.batch_pipeline = None
+        self.single_scan = None
+        self.batch_workers = int(self.db_service.get_setting("batch_workers", 2))
+        self.batch_auto_deskew = self.db_service.get_setting("batch_auto_deskew", "0") == "1"
+        # Scan to PDF: batch pages are appended to an open PDF as they arrive
+        self.scan_to_pdf = tk.BooleanVar(value=False)
+        self.batch_pdf = None
+        self.batch_pdf_worker = None
 
         self.init_ui()
 
+    def on_close(self):
+        # Spilled pages are not kept between sessions
+        self.page_store.close()
+        self.destroy()
+
     def init_ui(self):
         # 1. Top Section (Header + ribbon)
         self.top_section = ctk.CTkFrame(self, fg_color=COLORS["surface"], height=140, corner_radius=0)
@@ -164,7 +215,10 @@ class ScannerApp(ctk.CTk):
         self.h_scroll = ctk.CTkScrollbar(self.center_area, orientation="horizontal", command=self.preview_canvas.xview)
         self.h_scroll.grid(row=1, column=0, sticky="ew", padx=(20, 0), pady=(0, 20))
         
-        self.preview_canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+        self.preview_canvas.configure(yscrollcommand=self.on_preview_yscroll, xscrollcommand=self.on_preview_xscroll)
+        # Draws only the page tiles inside the viewport, more are revealed on scroll/pan
+        self.page_view = TiledImageView(self.preview_canvas, tag="page_img")
+        self.preview_canvas.bind("<Configure>", self.page_view.update)
         
         self.preview_canvas.bind("<Button-1>", self.on_mouse_down)
         self.preview_canvas.bind("<B1-Motion>", self.on_mouse_drag)
@@ -192,6 +246,10 @@ class ScannerApp(ctk.CTk):
         self.zoom_label = ctk.CTkLabel(zoom_frame, text="100%", width=40, font=FONTS["micro"])
         self.zoom_label.pack(side="left")
 
+        # Time-to-preview of the last edit (background render latency)
+        self.render_stats_label = ctk.CTkLabel(self.status_bar, text="", font=FONTS["micro"], text_color=COLORS["text_light"])
+        self.render_stats_label.pack(side="right", padx=10)
+
         # Initialize Ribbon Panels
         self.ribbon_panels = {}
         for tab_id in ["scanner", "editor"]:
@@ -235,8 +293,9 @@ class ScannerApp(ctk.CTk):
                                       text_color="white", corner_radius=10, width=25, font=("Segoe UI", 11, "bold"))
         self.page_badge.pack(side="right")
 
-        self.thumb_scroll = ctk.CTkScrollableFrame(self.thumbnails_panel, fg_color="transparent")
-        self.thumb_scroll.pack(fill="both", expand=True, padx=0)
+        self.thumb_strip = ThumbnailStrip(self.thumbnails_panel, on_select=self.select_page,
+                                          get_thumbnail=self.get_thumbnail, fg_color="transparent")
+        self.thumb_strip.pack(fill="both", expand=True, padx=0)
         
         actions = ctk.CTkFrame(self.thumbnails_panel, fg_color="transparent", height=60)
         actions.pack(fill="x", padx=5, pady=10)
@@ -315,17 +374,31 @@ class ScannerApp(ctk.CTk):
             if p['grayscale']: self.gray_switch_editor.select()
             else: self.gray_switch_editor.deselect()
 
+    @metered
     def select_page(self, index):
         if 0 <= index < len(self.pages):
+            # Finish deferred edits and drop cached intermediates of the page we are leaving
+            if index != self.current_page_index and 0 <= self.current_page_index < len(self.pages):
+                leaving = self.pages[self.current_page_index]
+                self.get_processed(self.current_page_index)
+                leaving['pipeline'].release()
+                leaving['preview_pipeline'].invalidate()
             self.current_page_index = index
-            self.display_page(self.pages[index]['processed'])
+            self.display_processed(index)
             self.update_thumbnails()
             self.sync_editor_controls()
             # Enable buttons
             for b in [self.save_img_btn, self.save_pdf_btn, self.preview_pdf_btn, self.print_btn, self.delete_btn, self.clear_all_btn]:
                 b.configure(state="normal")
 
-    def display_page(self, pil_image):
+    def display_processed(self, index):
+        """Displays a page's full render, zooming from its pyramid when it is ready"""
+        img = self.get_processed(index)
+        self.display_page(img, pyramid=self.get_pyramid(self.pages[index]))
+
+    def display_page(self, pil_image, source_scale=1.0, pyramid=None):
+        """Shows an image on the canvas. source_scale is the image/full-page ratio when showing a preview proxy,
+        pyramid (of pil_image) lets the tiles resample a smaller level instead of the full image"""
         if not pil_image: return
         self.update_idletasks()
         cw, ch = self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height()
@@ -333,95 +406,227 @@ class ScannerApp(ctk.CTk):
         
         # Base scale to fit screen
         fit_scale = min(cw / pil_image.width, ch / pil_image.height) * 0.95
-        self.display_scale = fit_scale * self.zoom_level
+        scale = fit_scale * self.zoom_level
+        # display_scale always maps full-resolution page pixels to canvas pixels
+        self.display_scale = scale * source_scale
         
-        new_size = (int(pil_image.width * self.display_scale), int(pil_image.height * self.display_scale))
+        new_size = (int(pil_image.width * scale), int(pil_image.height * scale))
         if new_size[0] < 1 or new_size[1] < 1: return
         
-        disp_img = pil_image.resize(new_size, Image.Resampling.LANCZOS)
-        self.tk_image_ref = ImageTk.PhotoImage(disp_img)
         self.preview_canvas.delete("all")
         
-        # Center the image relative to the scrollregion
-        # If smaller than canvas, we still want it centered
-        self.preview_canvas.create_image(max(cw, new_size[0])/2, max(ch, new_size[1])/2, 
-                                       image=self.tk_image_ref, tags="page_img", anchor="center")
-        
         # Update scrollregion
         self.preview_canvas.config(scrollregion=(0, 0, max(cw, new_size[0]), max(ch, new_size[1])))
+        
+        # Center the image relative to the scrollregion
+        # If smaller than canvas, we still want it centered
+        origin = ((max(cw, new_size[0]) - new_size[0]) / 2, (max(ch, new_size[1]) - new_size[1]) / 2)
+        if pyramid is not None:
+            level, level_scale = pyramid.level_for(scale)
+            self.page_view.show(level, scale / level_scale, origin)
+        else:
+            self.page_view.show(pil_image, scale, origin)
+
+    def on_preview_xscroll(self, first, last):
+        self.h_scroll.set(first, last)
+        self.page_view.update()
+
+    def on_preview_yscroll(self, first, last):
+        self.v_scroll.set(first, last)
+        self.page_view.update()
 
     def on_zoom_change(self, val):
         self.zoom_level = float(val)
         self.zoom_label.configure(text=f"{int(self.zoom_level * 100)}%")
         if self.current_page_index != -1:
-            self.display_page(self.pages[self.current_page_index]['processed'])
+            self.display_processed(self.current_page_index)
         else:
             # If no page, just reset scrollregion
             self.preview_canvas.config(scrollregion=self.preview_canvas.bbox("all"))
 
     def update_thumbnails(self):
-        for w in self.thumb_scroll.winfo_children(): w.destroy()
-        for i, p in enumerate(self.pages):
-            is_sel = (i == self.current_page_index)
-            # Use colorful gradient for selected thumbnail
-            sel_color = COLORS["accent_violet"] if is_sel else "transparent"
-            f = ctk.CTkFrame(self.thumb_scroll, fg_color=sel_color, height=80, corner_radius=8)
-            f.pack(fill="x", pady=2, padx=5)
-            f.pack_propagate(False)
-            
-            thumb = p['processed'].copy()
-            thumb.thumbnail((70, 60))
-            tk_t = ImageTk.PhotoImage(thumb)
-            l_img = tk.Label(f, image=tk_t, bg=sel_color if is_sel else COLORS["surface"])
-            l_img.image = tk_t
-            l_img.pack(side="left", padx=5)
-            ctk.CTkLabel(f, text=f"Page {i+1}", text_color="white" if is_sel else COLORS["text"], 
-                        font=("Segoe UI", 11, "bold" if is_sel else "normal")).pack(side="left", padx=5)
-            
-            for w in [f, l_img]: 
-                w.bind("<Button-1>", lambda e, idx=i: self.select_page(idx))
+        # Virtualized: only the visible rows are (re)drawn, whatever the page count
+        self.thumb_strip.refresh(len(self.pages), self.current_page_index)
+
+    def get_thumbnail(self, index):
+        """Thumbnail bitmap of a page, cached per page render revision and taken from the
+        page pyramid. Until the pyramid is built the previous bitmap (or None) is returned."""
+        p = self.pages[index]
+        pipeline = p['pipeline']
+        cached = p['thumbnail']
+        if cached is not None and pipeline.is_rendered(p) and cached[0] == pipeline.revision:
+            return cached[1]
+        # Spilled pages and the page with deferred slider edits keep their old thumbnail
+        if cached is not None and not pipeline.is_rendered(p) and self.defers_render(p):
+            return cached[1]
+        pyramid = self.get_pyramid(p)
+        if pyramid is not None:
+            p['thumbnail'] = (pipeline.revision, pyramid.fit(ThumbnailStrip.THUMB_SIZE, Image.Resampling.BICUBIC))
+            return p['thumbnail'][1]
+        return cached[1] if cached else None
+
+    def get_pyramid(self, p):
+        """Resolution pyramid of a page's current render, or None while the background worker builds it"""
+        pipeline = p['pipeline']
+        cached = p['pyramid']
+        if cached is not None and pipeline.is_rendered(p) and cached[0] == pipeline.revision:
+            return cached[1]
+
+        # The page with deferred slider edits waits for its full render before rebuilding
+        if cached is not None and not pipeline.is_rendered(p) and self.defers_render(p):
+            return None
+
+        if not self.pyramid_worker.is_busy(id(p)):
+            snap = EditPipeline.snapshot(p)
+
+            def build():
+                img = pipeline.render(snap)
+                return pipeline.revision, ImagePyramid(img)
+
+            self.pyramid_worker.submit(id(p), build, lambda res: self.on_pyramid_ready(p, res))
+        return None
+
+    def defers_render(self, p):
+        """True for pages whose stale bitmaps are kept instead of rebuilt: spilled pages
+        (rebuilding would reload them) and the current page, whose edits render on commit"""
+        if p.spilled: return True
+        return 0 <= self.current_page_index < len(self.pages) and self.pages[self.current_page_index] is p
+
+    def on_pyramid_ready(self, p, result):
+        if p.spilled:
+            # Page went to disk while its pyramid was being built: drop what that render left behind
+            p['pipeline'].invalidate()
+            return
+        p['pyramid'] = result
+        if not self.defers_render(p):
+            # Only the page being edited needs its stage intermediates
+            p['pipeline'].release()
+        self.page_store.enforce_budget(keep=p)
+        self.update_thumbnails()
+
+    def get_upload_image(self, index):
+        """Page image for AI requests, downsampled from the pyramid when it is ready"""
+        img = self.get_processed(index)
+        pyramid = self.get_pyramid(self.pages[index])
+        if pyramid is not None:
+            return pyramid.fit((OpenAIService.MAX_IMAGE_SIZE, OpenAIService.MAX_IMAGE_SIZE))
+        return img
 
     def create_page_data(self, pil_image):
         """Helper to create a standard page dictionary with all required keys"""
-        return {
-            'original': pil_image.copy(),
-            'processed': pil_image.copy(),
+        # Copy-on-write share of the caller's image; with no edits yet the render is the original itself
+        original = PageBitmap.share(pil_image)
+        return PageData(self.page_store, {
+            'original': original,
+            'processed': original,
             'rotation': 0,
             'flip_h': False,
             'flip_v': False,
             'brightness': 1.0,
             'contrast': 1.0,
             'grayscale': False,
+            'pipeline': EditPipeline(),
+            'preview_pipeline': EditPipeline(max_size=(self.winfo_screenwidth(), self.winfo_screenheight())),
+            'thumbnail': None,  # (render revision, PIL thumbnail)
+            'blank_confidence': None,  # Set when a scanned page was kept but may be blank
+            'pyramid': None,  # (render revision, ImagePyramid)
             'undo_stack': [],
             'redo_stack': []
-        }
+        })
 
     def apply_modifications(self, index):
         if not (0 <= index < len(self.pages)): return
-        p = self.pages[index]
-        img = p['original'].copy()
-        if p['rotation'] != 0: img = img.rotate(p['rotation'], expand=True)
-        if p['flip_h']: img = img.transpose(Image.FLIP_LEFT_RIGHT)
-        if p['flip_v']: img = img.transpose(Image.FLIP_TOP_BOTTOM)
-        if p['brightness'] != 1.0: img = ImageEnhance.Brightness(img).enhance(p['brightness'])
-        if p['contrast'] != 1.0: img = ImageEnhance.Contrast(img).enhance(p['contrast'])
-        if p['grayscale']: img = img.convert('L')
-        p['processed'] = img
-        self.display_page(img)
+        # Cached pipeline: only stages whose parameters changed are recomputed
+        self.display_processed(index)
         self.update_thumbnails()
+        # Copy statistics of the action are recorded once it returns
+        self.after_idle(self.update_render_stats)
 
+    def preview_modifications(self, index):
+        """Live preview while dragging: the background worker renders the edits on the
+        screen-sized proxy. The full-resolution render is deferred until commit_modifications or get_processed."""
+        if not (0 <= index < len(self.pages)): return
+        p = self.pages[index]
+        pipeline, snap = p['preview_pipeline'], EditPipeline.snapshot(p)
+        # Superseded slider ticks for this page are dropped by the scheduler
+        self.render_scheduler.submit(('preview', id(p)), lambda: pipeline.render(snap),
+                                     lambda img: self.on_preview_rendered(p, img))
+        # Fallback in case the slider release is never seen (e.g. keyboard input)
+        if self.commit_job: self.after_cancel(self.commit_job)
+        self.commit_job = self.after(400, self.commit_modifications)
+
+    def on_preview_rendered(self, p, img):
+        if self.current_page_index == -1 or self.pages[self.current_page_index] is not p: return
+        if p['pipeline'].is_rendered(p): return  # Full-resolution render already landed
+        self.display_page(img, source_scale=p['preview_pipeline'].scale)
+        self.update_render_stats()
+
+    def commit_modifications(self, event=None):
+        """Renders deferred preview edits of the current page at full resolution in the background"""
+        if self.commit_job:
+            self.after_cancel(self.commit_job)
+            self.commit_job = None
+        if self.current_page_index == -1: return
+        p = self.pages[self.current_page_index]
+        if p['pipeline'].is_rendered(p): return
+        pipeline, snap = p['pipeline'], EditPipeline.snapshot(p)
+        self.render_scheduler.submit(('full', id(p)), lambda: pipeline.render(snap),
+                                     lambda img: self.on_full_rendered(p, snap, img))
+
+    def on_full_rendered(self, p, snap, img):
+        # Page was edited again while the worker was busy
+        if not EditPipeline.is_current(snap, p): return
+        p['processed'] = img
+        if self.current_page_index != -1 and self.pages[self.current_page_index] is p:
+            self.display_processed(self.current_page_index)
+            self.update_thumbnails()
+        self.update_render_stats()
+
+    def update_render_stats(self):
+        stats = self.render_scheduler.stats
+        action, copied = copy_meter.last
+        # Page bitmap copies made by the last UI action itself, not by background renders
+        copy_text = f" · {action}: {copied / (1024 * 1024):.1f} MB page bitmap copies" if action else ""
+        self.render_stats_label.configure(text=f"⏱ {stats.last_ms:.0f} ms (avg {stats.avg_ms:.0f}){copy_text}")
+
+    def get_processed(self, index):
+        """Returns the full-resolution render of a page. Every consumer (preview, thumbnails, export,
+        OCR, save) goes through here; the pipeline's render cache makes unchanged pages free."""
+        p = self.pages[index]
+        if not p['pipeline'].is_rendered(p):
+            # Render now on this thread, a queued background render would be redundant
+            self.render_scheduler.cancel(('full', id(p)))
+        p['processed'] = ImageProcessor.process_page(p)
+        # Most recently used page stays in memory, the oldest ones may be spilled
+        self.page_store.touch(p)
+        return p['processed']
+
+    def export_snapshot(self, p):
+        """Picklable render input of a page for the export workers, safe to call from a worker thread.
+        A page with a cached render ships that render, so it is not rendered again."""
+        # Pinned: the UI thread must not spill the page while it is being read here
+        with self.page_store.pinned(p):
+            snap = EditPipeline.snapshot(p)
+            if p['pipeline'].is_rendered(snap):
+                # The render already has the edits applied; original_revision and edit_hash still describe the page
+                return dict(snap, original=p['pipeline'].render(snap), **EditPipeline.NO_EDITS)
+            return snap
+
+    @metered
     def rotate(self, angle):
         if self.current_page_index == -1: return
         self.save_state()
         self.pages[self.current_page_index]['rotation'] = (self.pages[self.current_page_index]['rotation'] + angle) % 360
         self.apply_modifications(self.current_page_index)
 
+    @metered
     def toggle_flip_h(self):
         if self.current_page_index == -1: return
         self.save_state()
         self.pages[self.current_page_index]['flip_h'] = not self.pages[self.current_page_index]['flip_h']
         self.apply_modifications(self.current_page_index)
 
+    @metered
     def toggle_flip_v(self):
         if self.current_page_index == -1: return
         self.save_state()
@@ -431,108 +636,223 @@ class ScannerApp(ctk.CTk):
     def update_brightness(self, val):
         if self.current_page_index == -1: return
         self.pages[self.current_page_index]['brightness'] = float(val)
-        self.apply_modifications(self.current_page_index)
+        self.preview_modifications(self.current_page_index)
 
     def update_contrast(self, val):
         if self.current_page_index == -1: return
         self.pages[self.current_page_index]['contrast'] = float(val)
-        self.apply_modifications(self.current_page_index)
+        self.preview_modifications(self.current_page_index)
 
+    @metered
     def toggle_grayscale(self):
         if self.current_page_index == -1: return
         self.save_state()
         self.pages[self.current_page_index]['grayscale'] = self.gray_switch_editor.get() == 1
         self.apply_modifications(self.current_page_index)
 
+    @metered
     def reset_edits(self, reload_ui=True, save_history=True):
         if self.current_page_index == -1: return
         if save_history: self.save_state()
-        self.pages[self.current_page_index].update({'rotation':0, 'flip_h':False, 'flip_v':False, 'brightness':1.0, 'contrast':1.0, 'grayscale':False})
+        self.pages[self.current_page_index].update(EditPipeline.NO_EDITS)
         if reload_ui: self.sync_editor_controls()
         self.apply_modifications(self.current_page_index)
 
     # --- Scanning ---
     def perform_scan(self):
+        if self.single_scan and self.single_scan.running: return
         self.log_status("Scanning...")
         # Show animated progress
         self.progress_bar.animate_to(0.3, duration=300)
         self.loading_spinner.pack(side="left", padx=10)
         self.loading_spinner.start()
-        
-        try:
-            new_img = self.scanner_service.scan_document()
-            if new_img:
-                # Animate progress to completion
-                self.progress_bar.animate_to(0.7, duration=200)
-                
-                if ImageProcessor.detect_blank_page(new_img):
-                    self.show_toast("Blank page skipped", "warning")
-                    self.log_status("⚠️ Blank page skipped")
-                    return
-                
-                self.pages.append(self.create_page_data(new_img))
-                self.select_page(len(self.pages) - 1)
-                self.page_badge.configure(text=str(len(self.pages)))
-                
-                # Complete progress
-                self.progress_bar.animate_to(1.0, duration=200)
-                self.show_toast("Page added successfully!", "success")
-                self.log_status("✅ Page added")
-            else: 
-                self.show_toast("Scan cancelled", "info")
-                self.log_status("Scan cancelled")
-        except Exception as e:
-            messagebox.showerror("Error", f"Scan failed: {e}")
-            self.show_toast("Scan failed", "error")
-            self.log_status("❌ Scan failed")
-        finally:
-            self.loading_spinner.stop()
-            self.loading_spinner.pack_forget()
-            # Reset progress after delay
-            self.after(1000, lambda: self.progress_bar.animate_to(0, duration=300))
+        self.scan_btn.configure(state="disabled")
+        # Acquisition and the blank check run off the UI thread, as a one-page batch
+        self.single_scan = BatchScanPipeline(
+            self.scanner_service.scan_document, self.process_scanned_page, self.on_scan_result,
+            post=lambda fn: self.after(0, fn), on_finished=self.on_scan_finished,
+            on_error=self.on_scan_error, target=1, workers=1)
+        self.single_scan.start()
+
+    @metered
+    def on_scan_result(self, results):
+        result = results[0]
+        if result is None:
+            self.show_toast("Blank page skipped", "warning")
+            self.log_status("⚠️ Blank page skipped")
+            return
+
+        # Animate progress to completion
+        self.progress_bar.animate_to(0.7, duration=200)
+        p = self.add_scanned_page(result)
+        self.select_page(len(self.pages) - 1)
+        self.page_badge.configure(text=str(len(self.pages)))
+
+        # Complete progress
+        self.progress_bar.animate_to(1.0, duration=200)
+        if p['blank_confidence'] is not None:
+            self.show_toast(f"Page added, may be blank ({p['blank_confidence']:.0%})", "warning")
+        else:
+            self.show_toast("Page added successfully!", "success")
+        timing = self.scanner_service.timing_summary()
+        self.log_status(f"✅ Page added ({timing})" if timing else "✅ Page added")
+
+    def on_scan_finished(self):
+        if not self.single_scan.delivered:
+            self.show_toast("Scan cancelled", "info")
+            self.log_status("Scan cancelled")
+        self.end_scan()
+
+    def on_scan_error(self, error):
+        messagebox.showerror("Error", f"Scan failed: {error}")
+        self.show_toast("Scan failed", "error")
+        self.log_status("❌ Scan failed")
+        self.end_scan()
+
+    def end_scan(self):
+        self.loading_spinner.stop()
+        self.loading_spinner.pack_forget()
+        self.scan_btn.configure(state="normal")
+        # Reset progress after delay
+        self.after(1000, lambda: self.progress_bar.animate_to(0, duration=300))
+
+    def process_scanned_page(self, img, deskew=False):
+        """
+        Scan worker thread: blank check, optional deskew and thumbnail of a scanned page.
+        Returns None for a blank page, else (image, thumbnail, blank confidence).
+        """
+        confidence = ImageProcessor.blank_page_confidence(img)
+        if confidence >= ImageProcessor.BLANK_CONFIDENCE: return None
+        if deskew:
+            img = ImageProcessor.deskew_image(img)
+        return img, ImageProcessor.make_thumbnail(img, ThumbnailStrip.THUMB_SIZE), confidence
+
+    def add_scanned_page(self, result):
+        """Appends a page processed by process_scanned_page; borderline blank pages keep their confidence as a flag"""
+        img, thumb, confidence = result
+        p = self.create_page_data(img)
+        p['thumbnail'] = (p['pipeline'].revision, thumb)
+        if confidence >= ImageProcessor.BLANK_BORDERLINE: p['blank_confidence'] = confidence
+        self.pages.append(p)
+        return p
 
     def start_batch_scan(self):
         if self.batch_scanning: self.stop_batch_scan(); return
+        if self.single_scan and self.single_scan.running: return
+        if self.batch_pipeline and self.batch_pipeline.running:
+            self.log_status("Finishing the previous batch...")
+            return
         
         def start_batch(res):
             try:
                 self.batch_target = int(res)
-                self.batch_count = 0
-                self.batch_scanning = True
-                self.batch_scan_btn.configure(text="⏹️ Stop", fg_color=COLORS["danger"])
-                self.scan_btn.configure(state="disabled")
-                self.show_thumbnails()
-                self.after(500, self.do_batch_scan)
             except: 
                 messagebox.showerror("Error", "Invalid number")
+                return
+            self.batch_count = 0
+            self.batch_skipped = 0
+            self.batch_flagged = 0
+            self.batch_scanning = True
+            if self.scan_to_pdf.get(): self.open_batch_pdf()
+            self.batch_scan_btn.configure(text="⏹️ Stop", fg_color=COLORS["danger"])
+            self.scan_btn.configure(state="disabled")
+            self.show_thumbnails()
+            # Scanning, page processing and UI updates overlap; results reach the UI every 100 ms at most
+            self.batch_pipeline = BatchScanPipeline(
+                self.scanner_service.scan_document, self.process_batch_page, self.on_batch_pages,
+                post=lambda fn: self.after(100, fn), on_finished=self.on_batch_finished,
+                on_error=self.on_batch_error, target=self.batch_target, workers=self.batch_workers)
+            self.batch_pipeline.start()
+            self.log_status("Batch scanning...")
 
         panel = TextInputPanel(self.sidebar_content, "Batch Scan", start_batch, prompt_text="Pages to scan (0 = continuous):", close_callback=self.show_thumbnails)
         self.switch_sidebar_to(panel, "Batch Setup")
 
-    def do_batch_scan(self):
-        if not self.batch_scanning: return
-        if self.batch_target > 0 and self.batch_count >= self.batch_target:
-            self.stop_batch_scan()
-            messagebox.showinfo("Done", f"Scanned {self.batch_count} pages")
-            return
-        self.log_status(f"Scanning {self.batch_count+1}...")
-        try:
-            img = self.scanner_service.scan_document()
-            if img:
-                self.pages.append(self.create_page_data(img))
-                self.batch_count += 1
-                self.select_page(len(self.pages) - 1)
-                self.page_badge.configure(text=str(len(self.pages)))
-                self.after(self.batch_delay, self.do_batch_scan)
-            else: self.stop_batch_scan()
-        except: self.stop_batch_scan()
+    def process_batch_page(self, img):
+        """Batch worker thread: process_scanned_page with the batch deskew setting"""
+        return self.process_scanned_page(img, self.batch_auto_deskew)
+
+    def on_batch_pages(self, results):
+        """Adds a group of processed batch pages with a single UI refresh"""
+        added = 0
+        for result in results:
+            if result is None:
+                self.batch_skipped += 1
+                continue
+            p = self.add_scanned_page(result)
+            if p['blank_confidence'] is not None: self.batch_flagged += 1
+            self.append_batch_pdf(p['original'])
+            added += 1
+        if added:
+            self.batch_count += added
+            self.select_page(len(self.pages) - 1)
+            self.page_badge.configure(text=str(len(self.pages)))
+        skipped = f", {self.batch_skipped} blank skipped" if self.batch_skipped else ""
+        flagged = f", {self.batch_flagged} possibly blank" if self.batch_flagged else ""
+        self.log_status(f"Batch: {self.batch_count} pages{skipped}{flagged} · {self.batch_pipeline.pages_per_minute:.1f} pages/min")
+
+    def on_batch_finished(self):
+        self.close_batch_pdf()
+        target_reached = self.batch_target > 0 and self.batch_pipeline.acquired >= self.batch_target
+        if self.batch_scanning: self.stop_batch_scan()
+        if target_reached: messagebox.showinfo("Done", f"Scanned {self.batch_count} pages")
+
+    def on_batch_error(self, error):
+        self.close_batch_pdf()
+        if self.batch_scanning: self.stop_batch_scan()
+        self.show_toast("Batch scan failed", "error")
+        self.log_status(f"❌ Batch scan failed: {error}")
 
     def stop_batch_scan(self):
+        """Stops acquiring; pages already scanned are still processed and added"""
         self.batch_scanning = False
+        if self.batch_pipeline: self.batch_pipeline.stop()
         self.batch_scan_btn.configure(text="📚 Batch Scan", fg_color="transparent")
         self.scan_btn.configure(state="normal")
         self.batch_status.configure(text="")
 
+    def open_batch_pdf(self):
+        """Scan to PDF: opens the output PDF the batch pages are appended to"""
+        folder = self.output_dir.get()
+        if not os.path.exists(folder): os.makedirs(folder)
+        path = self.get_unique_filepath(folder, f"{self.filename_prefix.get()}.pdf")
+        # Every page is committed to disk as an incremental update, a crash loses at most one page
+        self.batch_pdf = PdfWriter(path, jpeg_quality=self.pdf_jpeg_quality, profiles=self.pdf_profiles, incremental=True)
+        # Pages are encoded and appended on one worker thread, in scan order
+        self.batch_pdf_worker = ThreadPoolExecutor(max_workers=1)
+        self.log_status(f"Scanning to {os.path.basename(path)}")
+
+    def append_batch_pdf(self, img):
+        if self.batch_pdf is None: return
+        writer = self.batch_pdf
+
+        def append():
+            try:
+                writer.add_page(img)
+            except Exception as e:
+                error = str(e)
+                self.after(0, lambda: self.show_toast(f"Scan to PDF failed: {error}", "error"))
+        self.batch_pdf_worker.submit(append)
+
+    def close_batch_pdf(self):
+        """Finalizes the scan-to-PDF file once the pending pages are written"""
+        if self.batch_pdf is None: return
+        writer, worker = self.batch_pdf, self.batch_pdf_worker
+        self.batch_pdf = self.batch_pdf_worker = None
+
+        def finish():
+            if writer.page_count == 0:
+                writer.abort()
+                return
+            writer.close()
+            name = os.path.basename(writer.path)
+            try:
+                self.db_service.add_scan_history(name, writer.path, "PDF", writer.page_count, os.path.getsize(writer.path))
+            except: pass
+            self.after(0, lambda: self.log_status(f"Saved: {name} ({writer.page_count} pages)"))
+        worker.submit(finish)
+        worker.shutdown(wait=False)
+
     # --- Mouse / Cropping ---
     def toggle_crop_mode(self):
         if self.current_page_index == -1: return
@@ -554,6 +874,7 @@ class ScannerApp(ctk.CTk):
         else:
             # Panning logic
             self.preview_canvas.scan_dragto(event.x, event.y, gain=1)
+            self.page_view.update()
 
     def on_mouse_release(self, event):
         if self.cropping_active and self.crop_start:
@@ -562,10 +883,11 @@ class ScannerApp(ctk.CTk):
             self.preview_canvas.delete("crop_rect")
             self.crop_start = None
 
+    @metered
     def perform_crop(self):
-        self.save_state()
+        self.save_state(destructive=True)
         cw, ch = self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height()
-        img = self.pages[self.current_page_index]['processed']
+        img = self.get_processed(self.current_page_index)
         dw, dh = img.width * self.display_scale, img.height * self.display_scale
         ox, oy = (cw - dw)/2, (ch - dh)/2
         x1 = (min(self.crop_start[0], self.crop_end[0]) - ox) / self.display_scale
@@ -573,29 +895,32 @@ class ScannerApp(ctk.CTk):
         x2 = (max(self.crop_start[0], self.crop_end[0]) - ox) / self.display_scale
         y2 = (max(self.crop_start[1], self.crop_end[1]) - oy) / self.display_scale
         cropped = img.crop((int(x1), int(y1), int(x2), int(y2)))
-        self.pages[self.current_page_index]['original'] = cropped.copy()
+        self.pages[self.current_page_index]['original'] = cropped
         self.reset_edits(reload_ui=False, save_history=False)
         self.toggle_crop_mode()
 
     # --- AI Tools ---
+    @metered
     def perspective_fix(self):
         if self.current_page_index == -1: return
-        self.save_state()
+        self.save_state(destructive=True)
         try:
-            img = self.pages[self.current_page_index]['processed']
+            img = self.get_processed(self.current_page_index)
             res = ImageProcessor.automatic_document_transform(img)
             self.pages[self.current_page_index]['original'] = res
             self.reset_edits(reload_ui=False, save_history=False)
         except: messagebox.showerror("Error", "Perspective fix failed")
 
+    @metered
     def clean_document(self):
         if self.current_page_index == -1: return
-        self.save_state()
+        self.save_state(destructive=True)
         try:
-            img = self.pages[self.current_page_index]['processed']
+            img = self.get_processed(self.current_page_index)
             res = ImageProcessor.enhance_document_text(img)
-            self.pages[self.current_page_index]['processed'] = res
-            self.display_page(res)
+            # Bake into the original like the other fixes, so later edits don't discard it
+            self.pages[self.current_page_index]['original'] = res
+            self.reset_edits(reload_ui=False, save_history=False)
         except: pass
 
     # --- OpenAI Features ---
@@ -605,10 +930,11 @@ class ScannerApp(ctk.CTk):
 
     def perform_ocr(self):
         if self.current_page_index == -1: return
+        img = self.get_upload_image(self.current_page_index)
         
         def run():
             self.log_status("⏳ Extracting text...")
-            text = self.openai_service.extract_text_ocr(self.pages[self.current_page_index]['processed'])
+            text = self.openai_service.extract_text_ocr(img)
             self.after(0, lambda: self.show_ocr_result(text))
             self.after(0, lambda: self.log_status("✅ Text extracted"))
         
@@ -620,10 +946,11 @@ class ScannerApp(ctk.CTk):
 
     def perform_smart_rename(self):
         if self.current_page_index == -1: return
+        img = self.get_upload_image(self.current_page_index)
         
         def run():
             self.log_status("⏳ Generating name...")
-            name = self.openai_service.smart_rename(self.pages[self.current_page_index]['processed'])
+            name = self.openai_service.smart_rename(img)
             self.after(0, lambda: self.apply_rename(name))
         
         threading.Thread(target=run, daemon=True).start()
@@ -636,10 +963,11 @@ class ScannerApp(ctk.CTk):
 
     def perform_analysis(self):
         if self.current_page_index == -1: return
+        img = self.get_upload_image(self.current_page_index)
         
         def run():
             self.log_status("⏳ Analyzing document...")
-            result = self.openai_service.analyze_document(self.pages[self.current_page_index]['processed'])
+            result = self.openai_service.analyze_document(img)
             self.after(0, lambda: self.show_analysis_result(result))
             self.after(0, lambda: self.log_status("✅ Analysis complete"))
         
@@ -667,7 +995,7 @@ class ScannerApp(ctk.CTk):
         # Callback to get current page
         def get_page():
             if self.current_page_index != -1 and self.current_page_index < len(self.pages):
-                return self.pages[self.current_page_index]['processed']
+                return self.get_upload_image(self.current_page_index)
             return None
             
         # Check if chat is already open in sidebar?
@@ -675,26 +1003,111 @@ class ScannerApp(ctk.CTk):
         panel = AIChatWindow(self.sidebar_content, self.openai_service, get_page, close_callback=self.show_thumbnails)
         self.switch_sidebar_to(panel, "AI Chat")
 
+    @metered
     def privacy_blur(self):
         if self.current_page_index == -1: return
-        self.save_state()
+        self.save_state(destructive=True)
         try:
-            img = self.pages[self.current_page_index]['processed']
-            res = ImageProcessor.redact_faces(img)
-            self.pages[self.current_page_index]['processed'] = res
-            self.display_page(res)
+            img = self.get_processed(self.current_page_index)
+            res = ImageProcessor.redact_faces(img, self.privacy_blur_mode)
+            self.pages[self.current_page_index]['original'] = res
+            self.reset_edits(reload_ui=False, save_history=False)
         except: pass
 
+    @metered
     def auto_straighten(self):
         if self.current_page_index == -1: return
-        self.save_state()
+        self.save_state(destructive=True)
         try:
-            img = self.pages[self.current_page_index]['processed']
+            img = self.get_processed(self.current_page_index)
             res = ImageProcessor.deskew_image(img)
             self.pages[self.current_page_index]['original'] = res
             self.reset_edits(reload_ui=False, save_history=False)
         except: pass
 
+    def run_batch_profile(self):
+        """Runs the selected processing profile over every page in the export worker processes"""
+        if not self.pages:
+            messagebox.showwarning("No Pages", "No pages to process")
+            return
+        name = self.batch_profile_var.get()
+        steps = PROFILES[name]
+        pages = list(self.pages)
+        counts = {PROCESSED: 0, DROPPED: 0, FAILED: 0}
+
+        self.show_loading(f"{name}...")
+        cancel_event = threading.Event()
+        self.loading_overlay.set_cancel(cancel_event.set)
+
+        def deliver(page, img, error):
+            self.after(0, lambda: self.apply_batch_result(page, img, error, counts))
+
+        def progress(done, total):
+            self.after(0, lambda: self.update_loading_progress(f"{name}... page {done}/{total}", done / total))
+
+        def run():
+            try:
+                outcomes = run_profile(pages, self.export_snapshot, steps, deliver, progress, cancel_event,
+                                       self.export_workers, self.privacy_blur_mode)
+                self.after(0, lambda: self._on_batch_profile_done(name, outcomes, counts))
+            except Exception as e:
+                error = str(e)
+                self.after(0, lambda: self._on_batch_profile_error(error, counts))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def apply_batch_result(self, page, img, error, counts):
+        """Applies the result of one page of a batch profile: replaces its original (undoable) or drops it"""
+        index = next((i for i, p in enumerate(self.pages) if p is page), -1)
+        if index == -1: return  # Deleted while it was being processed
+        if error is not None:
+            counts[FAILED] += 1
+        elif img is None:
+            self.pages.pop(index)
+            if index < self.current_page_index: self.current_page_index -= 1
+            counts[DROPPED] += 1
+        else:
+            self.undo_journal.record(page, destructive=True)
+            page['original'] = img
+            page.update(EditPipeline.NO_EDITS)
+            # Drop the renders of the old original; the thumbnail strip rebuilds them in the background
+            page['processed'] = page['original']
+            page['thumbnail'] = None
+            page['pyramid'] = None
+            page['pipeline'].invalidate()
+            page['preview_pipeline'].invalidate()
+            counts[PROCESSED] += 1
+
+    def refresh_after_batch_profile(self):
+        self.page_badge.configure(text=str(len(self.pages)))
+        if not self.pages:
+            self.current_page_index = -1; self.preview_canvas.delete("all"); self.page_view.clear(); self.update_thumbnails()
+            return
+        index = min(max(self.current_page_index, 0), len(self.pages) - 1)
+        self.current_page_index = -1  # Show the page again even if the index did not change
+        self.select_page(index)
+
+    def format_batch_profile_counts(self, counts):
+        dropped = f", {counts[DROPPED]} blank removed" if counts[DROPPED] else ""
+        failed = f", {counts[FAILED]} failed" if counts[FAILED] else ""
+        return f"{counts[PROCESSED]} pages processed{dropped}{failed}"
+
+    def _on_batch_profile_done(self, name, outcomes, counts):
+        self.hide_loading()
+        self.refresh_after_batch_profile()
+        if outcomes is None:
+            self.log_status(f"{name} cancelled: {self.format_batch_profile_counts(counts)}")
+            return
+        self.show_toast(f"{name}: {self.format_batch_profile_counts(counts)}", "warning" if counts[FAILED] else "success")
+        self.log_status(f"✅ {name}: {self.format_batch_profile_counts(counts)}")
+
+    def _on_batch_profile_error(self, error_msg, counts):
+        self.hide_loading()
+        self.refresh_after_batch_profile()
+        messagebox.showerror("Error", f"Batch processing failed: {error_msg}")
+        self.log_status(f"❌ Batch processing failed: {self.format_batch_profile_counts(counts)}")
+
+    @metered
     def resize_to_paper_size(self):
         """Resize current page to selected paper size"""
         if self.current_page_index == -1:
@@ -709,7 +1122,7 @@ class ScannerApp(ctk.CTk):
             return
         
         target_w, target_h = size
-        current_img = self.pages[self.current_page_index]['processed']
+        current_img = self.get_processed(self.current_page_index)
         
         # Ask user for resize method
         choice = messagebox.askquestion(
@@ -720,7 +1133,8 @@ class ScannerApp(ctk.CTk):
         
         if choice == 'yes':
             # Fit - maintain aspect ratio
-            img_copy = current_img.copy()
+            # thumbnail() replaces the shared handle's buffer, the page's pixels are never copied
+            img_copy = PageBitmap.share(current_img)
             img_copy.thumbnail((target_w, target_h), Image.Resampling.LANCZOS)
             new_img = Image.new('RGB', (target_w, target_h), 'white')
             paste_x = (target_w - img_copy.width) // 2
@@ -742,10 +1156,9 @@ class ScannerApp(ctk.CTk):
             else:
                 new_img = cropped
         
+        self.save_state(destructive=True)
         self.pages[self.current_page_index]['original'] = new_img
-        self.pages[self.current_page_index]['processed'] = new_img.copy()
         self.reset_edits(reload_ui=False, save_history=False)
-        self.apply_modifications(self.current_page_index)
         self.log_status(f"Resized to {selected}")
 
     # --- Annotate ---
@@ -754,25 +1167,29 @@ class ScannerApp(ctk.CTk):
         if self.current_page_index == -1: return
         
         def apply(txt):
-            img = ImageProcessor.add_text(self.pages[self.current_page_index]['processed'], txt, (50,50))
+            img = ImageProcessor.add_text(self.get_processed(self.current_page_index), txt, (50,50))
+            self.save_state(destructive=True)
             self.pages[self.current_page_index]['original'] = img
-            self.reset_edits(reload_ui=False)
+            self.reset_edits(reload_ui=False, save_history=False)
             self.show_thumbnails()
 
         panel = TextInputPanel(self.sidebar_content, "Add Text", apply, prompt_text="Enter text to add:", close_callback=self.show_thumbnails)
         self.switch_sidebar_to(panel, "Annotate")
 
+    @metered
     def apply_watermark(self):
         if self.current_page_index == -1: return
-        img = self.pages[self.current_page_index]['processed']
+        img = self.get_processed(self.current_page_index)
         res = ImageProcessor.add_watermark(img, self.watermark_text.get(), self.watermark_position.get())
+        self.save_state(destructive=True)
         self.pages[self.current_page_index]['original'] = res
-        self.reset_edits(reload_ui=False)
+        self.reset_edits(reload_ui=False, save_history=False)
 
     # --- Layout ---
+    @metered
     def split_current_page(self):
         if self.current_page_index == -1: return
-        img = self.pages[self.current_page_index]['processed']
+        img = self.get_processed(self.current_page_index)
         l, r = ImageProcessor.split_image_vertical(img)
         self.pages[self.current_page_index] = self.create_page_data(l)
         self.pages.insert(self.current_page_index+1, self.create_page_data(r))
@@ -784,80 +1201,27 @@ class ScannerApp(ctk.CTk):
         self.switch_sidebar_to(panel, "Help Guide")
 
     # --- Undo / Redo ---
-    def save_state(self):
-        """Save current page state to undo stack before a change"""
+    def save_state(self, destructive=False):
+        """Save current page state to undo history before a change (destructive: the change replaces the original)"""
         if self.current_page_index == -1: return
-        p = self.pages[self.current_page_index]
-        # Store state as a dict snapshot
-        state = {
-            'original': p['original'].copy(),
-            'rotation': p['rotation'],
-            'flip_h': p['flip_h'],
-            'flip_v': p['flip_v'],
-            'brightness': p['brightness'],
-            'contrast': p['contrast'],
-            'grayscale': p['grayscale']
-        }
-        p['undo_stack'].append(state)
-        # Limit stack size to save memory
-        if len(p['undo_stack']) > 20:
-            p['undo_stack'].pop(0)
-        # Clear redo stack since we've made a new change
-        p['redo_stack'].clear()
+        self.undo_journal.record(self.pages[self.current_page_index], destructive)
 
+    @metered
     def undo(self):
         if self.current_page_index == -1: return
-        p = self.pages[self.current_page_index]
-        if not p['undo_stack']: 
+        if not self.undo_journal.undo(self.pages[self.current_page_index]):
             self.log_status("Nothing to undo")
             return
-        
-        # Save current state to redo stack
-        current_state = {
-            'original': p['original'].copy(),
-            'rotation': p['rotation'],
-            'flip_h': p['flip_h'],
-            'flip_v': p['flip_v'],
-            'brightness': p['brightness'],
-            'contrast': p['contrast'],
-            'grayscale': p['grayscale']
-        }
-        p['redo_stack'].append(current_state)
-        
-        # Restore last state
-        last_state = p['undo_stack'].pop()
-        p.update(last_state)
-        # We need to make sure we don't just reference the image
-        p['original'] = last_state['original'].copy()
-        
         self.apply_modifications(self.current_page_index)
         self.sync_editor_controls()
         self.log_status("Undo performed")
 
+    @metered
     def redo(self):
         if self.current_page_index == -1: return
-        p = self.pages[self.current_page_index]
-        if not p['redo_stack']:
+        if not self.undo_journal.redo(self.pages[self.current_page_index]):
             self.log_status("Nothing to redo")
             return
-            
-        # Save current state to undo stack
-        current_state = {
-            'original': p['original'].copy(),
-            'rotation': p['rotation'],
-            'flip_h': p['flip_h'],
-            'flip_v': p['flip_v'],
-            'brightness': p['brightness'],
-            'contrast': p['contrast'],
-            'grayscale': p['grayscale']
-        }
-        p['undo_stack'].append(current_state)
-        
-        # Restore next state
-        next_state = p['redo_stack'].pop()
-        p.update(next_state)
-        p['original'] = next_state['original'].copy()
-        
         self.apply_modifications(self.current_page_index)
         self.sync_editor_controls()
         self.log_status("Redo performed")
@@ -865,10 +1229,11 @@ class ScannerApp(ctk.CTk):
     def reverse_pages(self):
         self.pages.reverse(); self.select_page(0)
 
+    @metered
     def create_collage_grid(self):
         if len(self.pages) < 2: return
         cols, rows = map(int, self.grid_layout_var.get().split('x'))
-        res = ImageProcessor.create_photo_grid([p['processed'] for p in self.pages], f"{cols}x{rows}")
+        res = ImageProcessor.create_photo_grid([self.get_processed(i) for i in range(len(self.pages))], f"{cols}x{rows}")
         self.pages.append(self.create_page_data(res))
         self.select_page(len(self.pages)-1)
 
@@ -896,13 +1261,14 @@ class ScannerApp(ctk.CTk):
         path = self.get_unique_filepath(folder, base_name)
         
         try:
-            self.pages[self.current_page_index]['processed'].save(path, "JPEG")
+            self.get_processed(self.current_page_index).save(path, "JPEG")
             self.db_service.add_scan_history(os.path.basename(path), path, "JPEG", 1, os.path.getsize(path))
             messagebox.showinfo("Saved", f"Image saved to:\n{os.path.basename(path)}")
             self.show_toast("Image saved successfully", "success")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save image: {e}")
 
+    @metered
     def save_as_pdf(self):
         if not self.pages: 
             messagebox.showwarning("No Pages", "No pages to save")
@@ -915,35 +1281,56 @@ class ScannerApp(ctk.CTk):
         path = self.get_unique_filepath(folder, base_name)
         
         self.show_loading("Saving PDF...")
+        pages = list(self.pages)
+        cancel_event = threading.Event()
+        self.loading_overlay.set_cancel(cancel_event.set)
+        
+        def progress(done, total):
+            self.after(0, lambda: self.update_loading_progress(f"Saving PDF... page {done}/{total}", done / total))
         
         def run_save():
             try:
-                # Convert all to RGB for PDF compatibility
-                imgs = []
-                for p in self.pages:
-                    if p['processed'].mode == 'RGBA':
-                        imgs.append(p['processed'].convert('RGB'))
-                    else:
-                        imgs.append(p['processed'])
-                
-                if not imgs: return
-                
-                imgs[0].save(path, "PDF", save_all=True, append_images=imgs[1:])
+                # Pages are rendered, encoded and written one at a time
+                summary = write_pdf(path, pages, self.export_snapshot, progress, cancel_event, **self.pdf_options())
+                if summary is None:
+                    self.after(0, self._on_save_pdf_cancelled)
+                    return
                 
                 # Add to history
                 try:
-                    self.db_service.add_scan_history(os.path.basename(path), path, "PDF", len(self.pages), os.path.getsize(path))
+                    self.db_service.add_scan_history(os.path.basename(path), path, "PDF", len(pages), os.path.getsize(path))
                 except: pass
                 
-                self.after(0, lambda: self._on_save_pdf_success(path))
+                self.after(0, lambda: self._on_save_pdf_success(path, summary))
             except Exception as e:
-                self.after(0, lambda: self._on_save_pdf_error(str(e)))
+                error = str(e)
+                self.after(0, lambda: self._on_save_pdf_error(error))
         
         threading.Thread(target=run_save, daemon=True).start()
 
-    def _on_save_pdf_success(self, path):
+    def _on_save_pdf_cancelled(self):
         self.hide_loading()
-        messagebox.showinfo("Saved", f"PDF saved successfully as:\n{os.path.basename(path)}")
+        self.log_status("PDF export cancelled")
+
+    def pdf_options(self):
+        """write_pdf keyword arguments from the export settings"""
+        return {'workers': self.export_workers, 'jpeg_quality': self.pdf_jpeg_quality,
+                'profiles': self.pdf_profiles, 'cache': self.export_cache}
+
+    def format_export_summary(self, summary, max_lines=15):
+        """One line per page: compression profile, encoding and size"""
+        lines = []
+        for i, (profile, encoding, size) in enumerate(summary[:max_lines]):
+            label = f"{profile}, " if profile else ""
+            lines.append(f"Page {i+1}: {label}{encoding}, {size / 1024:.0f} KB")
+        if len(summary) > max_lines:
+            lines.append(f"... and {len(summary) - max_lines} more pages")
+        return "\n".join(lines)
+
+    def _on_save_pdf_success(self, path, summary):
+        self.hide_loading()
+        messagebox.showinfo("Saved", f"PDF saved successfully as:\n{os.path.basename(path)}\n\n"
+                                     f"{self.format_export_summary(summary)}")
         self.show_toast("PDF saved successfully", "success")
         self.log_status(f"Saved: {os.path.basename(path)}")
 
@@ -964,32 +1351,54 @@ class ScannerApp(ctk.CTk):
 
     def preview_pdf(self):
         if not self.pages: return
-        try:
-            path = os.path.join(os.environ.get('TEMP', '.'), "preview.pdf")
-            imgs = [p['processed'].convert("RGB") for p in self.pages]
-            imgs[0].save(path, "PDF", save_all=True, append_images=imgs[1:])
-            os.startfile(path)
-        except: pass
+        self.export_temp_pdf("preview.pdf", "Preparing preview...", os.startfile)
 
     def print_document(self):
         if not self.pages: return
+        self.export_temp_pdf("print.pdf", "Preparing print...", lambda path: os.startfile(path, "print"))
+
+    def export_temp_pdf(self, name, message, open_file):
+        """Writes the pages to a temp PDF on a background thread, then calls open_file(path) on the UI thread"""
+        path = os.path.join(os.environ.get('TEMP', '.'), name)
+        self.show_loading(message)
+        pages = list(self.pages)
+        cancel_event = threading.Event()
+        self.loading_overlay.set_cancel(cancel_event.set)
+
+        def progress(done, total):
+            self.after(0, lambda: self.update_loading_progress(f"{message} page {done}/{total}", done / total))
+
+        def run_export():
+            try:
+                summary = write_pdf(path, pages, self.export_snapshot, progress, cancel_event, **self.pdf_options())
+                if summary is None:
+                    self.after(0, self._on_save_pdf_cancelled)
+                    return
+                self.after(0, lambda: self._on_temp_pdf_ready(path, open_file))
+            except Exception as e:
+                error = str(e)
+                self.after(0, lambda: self._on_save_pdf_error(error))
+
+        threading.Thread(target=run_export, daemon=True).start()
+
+    def _on_temp_pdf_ready(self, path, open_file):
+        self.hide_loading()
         try:
-            path = os.path.join(os.environ.get('TEMP', '.'), "print.pdf")
-            imgs = [p['processed'].convert("RGB") for p in self.pages]
-            imgs[0].save(path, "PDF", save_all=True, append_images=imgs[1:])
-            os.startfile(path, "print")
-        except: pass
+            open_file(path)
+        except Exception as e:
+            self.show_toast(f"Could not open PDF: {e}", "error")
 
     def delete_current_page(self):
         if self.current_page_index != -1:
             self.pages.pop(self.current_page_index)
-            if not self.pages: self.current_page_index = -1; self.preview_canvas.delete("all")
+            if not self.pages: self.current_page_index = -1; self.preview_canvas.delete("all"); self.page_view.clear(); self.update_thumbnails()
             else: self.select_page(max(0, self.current_page_index-1))
             self.page_badge.configure(text=str(len(self.pages)))
 
     def clear_all_pages(self):
         if messagebox.askyesno("Clear", "Clear all pages?"):
-            self.pages = []; self.current_page_index = -1; self.preview_canvas.delete("all"); self.page_badge.configure(text="0")
+            self.pages = []; self.current_page_index = -1; self.preview_canvas.delete("all"); self.page_view.clear(); self.page_badge.configure(text="0")
+            self.update_thumbnails()
 
     def log_status(self, msg):
         self.status_label.configure(text=f"ℹ️ {msg}"); self.update_idletasks()
@@ -1004,6 +1413,11 @@ class ScannerApp(ctk.CTk):
         self.loading_overlay.update_message(message)
         self.loading_overlay.show()
     
+    def update_loading_progress(self, message, value):
+        """Update loading overlay message and progress (0.0 to 1.0)"""
+        self.loading_overlay.update_message(message)
+        self.loading_overlay.update_progress(value)
+    
     def hide_loading(self):
         """Hide loading overlay"""
         self.loading_overlay.hide()
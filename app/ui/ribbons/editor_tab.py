@@ -2,6 +2,7 @@ import tkinter as tk
 import customtkinter as ctk
 from app.core.constants import COLORS, FONTS
 from app.ui.widgets.common import create_ribbon_group, RibbonButton, LargeRibbonButton
+from app.services.batch_processor import PROFILES
 
 def setup_editor_tab(app, panel):
     # ==================== EDITOR TOOLS ====================
@@ -40,6 +41,8 @@ def setup_editor_tab(app, panel):
     app.bright_slider_editor = ctk.CTkSlider(b_frame, from_=0.5, to=2.0, command=app.update_brightness, 
                                             width=110, height=16, progress_color=COLORS["accent_orange"])
     app.bright_slider_editor.set(1.0)
+    # Dragging only renders the preview proxy; the full render happens on release
+    app.bright_slider_editor.bind("<ButtonRelease-1>", app.commit_modifications)
     app.bright_slider_editor.pack(side="left", padx=5)
     
     # Contrast
@@ -49,6 +52,7 @@ def setup_editor_tab(app, panel):
     app.cont_slider_editor = ctk.CTkSlider(c_frame, from_=0.5, to=2.0, command=app.update_contrast, 
                                           width=110, height=16, progress_color=COLORS["accent_violet"])
     app.cont_slider_editor.set(1.0)
+    app.cont_slider_editor.bind("<ButtonRelease-1>", app.commit_modifications)
     app.cont_slider_editor.pack(side="left", padx=5)
     
     app.gray_switch_editor = ctk.CTkSwitch(adjust_grp, text="Black & White", command=app.toggle_grayscale, 
@@ -89,6 +93,21 @@ def setup_editor_tab(app, panel):
                                            fg_color=COLORS["accent_sky"], text_color="white")
     app.ai_straight_btn.pack(side="left", padx=3)
 
+    # Batch profiles (all pages)
+    batch_grp = create_ribbon_group(panel, "Batch Fix")
+    
+    sel_col = ctk.CTkFrame(batch_grp, fg_color="transparent")
+    sel_col.pack(side="left", padx=5)
+    
+    ctk.CTkLabel(sel_col, text="Profile", font=FONTS["small"], text_color="white").pack(anchor="w")
+    app.batch_profile_var = ctk.StringVar(value=next(iter(PROFILES)))
+    ctk.CTkOptionMenu(sel_col, variable=app.batch_profile_var, values=list(PROFILES),
+                      width=170, height=28, font=FONTS["small"]).pack(pady=5)
+    
+    app.batch_fix_btn = LargeRibbonButton(batch_grp, "⚡", "All Pages", command=app.run_batch_profile,
+                                         fg_color=COLORS["accent_orange"], text_color="white")
+    app.batch_fix_btn.pack(side="left", padx=3)
+
     # OpenAI Group
     openai_grp = create_ribbon_group(panel, "OpenAI Intelligence")
     
@@ -14,6 +14,11 @@ def setup_scanner_tab(app, panel):
                                           fg_color=COLORS["accent_violet"], text_color="white", width=90)
     app.batch_scan_btn.pack(side="left", padx=4)
     
+    app.scan_to_pdf_switch = ctk.CTkSwitch(cap_grp, text="To PDF", variable=app.scan_to_pdf,
+                                           font=FONTS["small"], text_color="white",
+                                           progress_color=COLORS["accent_orange"])
+    app.scan_to_pdf_switch.pack(side="left", padx=4)
+    
     app.batch_status = ctk.CTkLabel(cap_grp, text="", font=FONTS["micro"], text_color=COLORS["text"])
     app.batch_status.place(relx=0.5, rely=0.05, anchor="n")
     
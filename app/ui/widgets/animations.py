@@ -151,8 +151,14 @@ class ProgressOverlay(ctk.CTkFrame):
         self.progress.pack(pady=(0, 30), padx=40)
         self.progress.set(0)
         
+        # Cancel button, only shown for cancellable tasks (see set_cancel)
+        self.cancel_button = ctk.CTkButton(container, text="Cancel", width=100,
+                                           fg_color="#e2e8f0", hover_color="#cbd5e1",
+                                           text_color="#0f172a")
+        
     def show(self):
         """Show the overlay and start animation"""
+        self.progress.set(0)
         self.place(relx=0, rely=0, relwidth=1, relheight=1)
         self.lift()
         self.spinner.start()
@@ -160,8 +166,17 @@ class ProgressOverlay(ctk.CTkFrame):
     def hide(self):
         """Hide the overlay and stop animation"""
         self.spinner.stop()
+        self.set_cancel(None)
         self.place_forget()
     
+    def set_cancel(self, command):
+        """Show a Cancel button calling command, or hide it (None)"""
+        if command is None:
+            self.cancel_button.pack_forget()
+        else:
+            self.cancel_button.configure(command=command, state="normal")
+            self.cancel_button.pack(pady=(0, 20))
+    
     def update_message(self, message):
         """Update the loading message"""
         self.message_label.configure(text=message)
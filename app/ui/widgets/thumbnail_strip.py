@@ -0,0 +1,130 @@
+import tkinter as tk
+import customtkinter as ctk
+from PIL import ImageTk
+from app.core.constants import COLORS
+
+
+class ThumbnailRow:
+    """One recyclable row of the thumbnail strip: frame + bitmap + page label."""
+
+    def __init__(self, canvas, on_select, on_wheel):
+        self.index = -1
+        self.frame = ctk.CTkFrame(canvas, fg_color="transparent", height=80, corner_radius=8)
+        self.frame.pack_propagate(False)
+        self.window = canvas.create_window(0, 0, window=self.frame, anchor="nw", height=80)
+
+        self.image_label = tk.Label(self.frame, bg=COLORS["surface"])
+        self.image_label.pack(side="left", padx=5)
+        self.text_label = ctk.CTkLabel(self.frame, text="", text_color=COLORS["text"],
+                                       font=("Segoe UI", 11, "normal"))
+        self.text_label.pack(side="left", padx=5)
+
+        for w in [self.frame, self.image_label, self.text_label]:
+            w.bind("<Button-1>", lambda e: on_select(self.index))
+            w.bind("<MouseWheel>", on_wheel)
+            w.bind("<Button-4>", on_wheel)
+            w.bind("<Button-5>", on_wheel)
+
+        self.thumbnail = None  # PIL thumbnail currently shown
+        self.tk_image = None
+        self.selected = None
+
+    def set_index(self, index):
+        if index == self.index: return
+        self.index = index
+        self.text_label.configure(text=f"Page {index+1}")
+
+    def set_thumbnail(self, thumbnail):
+        if thumbnail is self.thumbnail: return
+        self.thumbnail = thumbnail
+        # No bitmap yet: the background decoder is still producing it
+        self.tk_image = ImageTk.PhotoImage(thumbnail) if thumbnail is not None else None
+        self.image_label.configure(image=self.tk_image if self.tk_image else "")
+
+    def set_selected(self, selected):
+        if selected == self.selected: return
+        self.selected = selected
+        sel_color = COLORS["accent_violet"] if selected else "transparent"
+        self.frame.configure(fg_color=sel_color)
+        self.image_label.configure(bg=sel_color if selected else COLORS["surface"])
+        self.text_label.configure(text_color="white" if selected else COLORS["text"],
+                                  font=("Segoe UI", 11, "bold" if selected else "normal"))
+
+
+class ThumbnailStrip(ctk.CTkFrame):
+    """
+    Virtualized page thumbnail list.
+
+    Only the rows intersecting the visible window (plus OVERSCAN rows on each
+    side) exist as widgets; rows scrolled out of view are recycled for the
+    rows scrolled in, so the UI cost does not grow with the page count.
+    get_thumbnail(index) may return None while a bitmap is being produced.
+    """
+
+    THUMB_SIZE = (70, 60)
+    ROW_HEIGHT = 84  # 80px row + 2px padding above and below
+    OVERSCAN = 3
+
+    def __init__(self, parent, on_select, get_thumbnail, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        self.get_thumbnail = get_thumbnail
+        self.count = 0
+        self.selected_index = -1
+        self.rows = {}  # page index -> visible row
+        self.pool = []  # hidden rows ready for reuse
+
+        self.canvas = tk.Canvas(self, bg=COLORS["surface"], highlightthickness=0,
+                                yscrollincrement=self.ROW_HEIGHT // 4)
+        self.scrollbar = ctk.CTkScrollbar(self, orientation="vertical", command=self.canvas.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+
+        self.canvas.bind("<Configure>", lambda e: self._layout())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", self._on_wheel)
+        self.canvas.bind("<Button-5>", self._on_wheel)
+
+    def refresh(self, count, selected_index):
+        """Updates page count / selection and redraws the visible rows"""
+        self.count = count
+        self.selected_index = selected_index
+        self.canvas.configure(scrollregion=(0, 0, 0, count * self.ROW_HEIGHT))
+        self._layout()
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._layout()
+
+    def _on_wheel(self, event):
+        if self.count == 0: return
+        if getattr(event, "num", None) == 4: step = -1
+        elif getattr(event, "num", None) == 5: step = 1
+        else: step = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(step * 4, "units")
+
+    def _layout(self):
+        height = self.canvas.winfo_height()
+        width = max(1, self.canvas.winfo_width() - 10)
+        top = max(0, self.canvas.canvasy(0))
+        first = max(0, int(top // self.ROW_HEIGHT) - self.OVERSCAN)
+        last = min(self.count, int((top + height) // self.ROW_HEIGHT) + 1 + self.OVERSCAN)
+
+        # Recycle rows that scrolled out of the window
+        for index in [i for i in self.rows if not first <= i < last]:
+            row = self.rows.pop(index)
+            self.canvas.itemconfigure(row.window, state="hidden")
+            self.pool.append(row)
+
+        for index in range(first, last):
+            row = self.rows.get(index)
+            if row is None:
+                row = self.pool.pop() if self.pool else ThumbnailRow(self.canvas, self.on_select, self._on_wheel)
+                self.rows[index] = row
+                self.canvas.coords(row.window, 5, index * self.ROW_HEIGHT + 2)
+                self.canvas.itemconfigure(row.window, state="normal")
+            self.canvas.itemconfigure(row.window, width=width)
+            row.set_index(index)
+            row.set_thumbnail(self.get_thumbnail(index))
+            row.set_selected(index == self.selected_index)
@@ -0,0 +1,89 @@
+import math
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+
+class TiledImageView:
+    """
+    Draws a PIL image on a tk.Canvas as fixed-size tiles.
+
+    Only tiles intersecting the current scroll viewport are resampled and
+    drawn; call update() whenever the view scrolls and newly revealed tiles
+    are added incrementally. Rendered tiles are cached per source image and
+    zoom level, so switching between pyramid levels keeps the tiles of the
+    others; the MAX_LEVELS most recently shown levels are kept.
+    """
+
+    TILE_SIZE = 512
+    MAX_LEVELS = 4
+
+    def __init__(self, canvas, tag="page_img"):
+        self.canvas = canvas
+        self.tag = tag
+        self.image = None
+        self.scale = 1.0
+        self.origin = (0, 0)
+        self.size = (0, 0)
+        self.levels = OrderedDict()  # (id(image), scale) -> (image, {(col, row): PhotoImage}), oldest first
+        self.drawn = set()
+
+    def show(self, pil_image, scale, origin):
+        """Shows pil_image resampled by scale, with its top-left corner at origin (canvas coords)"""
+        self.image = pil_image
+        self.scale = scale
+        self.origin = origin
+        self.size = (int(pil_image.width * scale), int(pil_image.height * scale))
+
+        # Most recently used level goes last, the oldest ones are evicted.
+        # The entry holds the image, so its id cannot be reused while cached
+        key = (id(pil_image), scale)
+        self.levels[key] = self.levels.pop(key, None) or (pil_image, {})
+        while len(self.levels) > self.MAX_LEVELS:
+            self.levels.popitem(last=False)
+
+        self.canvas.delete(self.tag)
+        self.drawn = set()
+        self.update()
+
+    def clear(self):
+        self.canvas.delete(self.tag)
+        self.image = None
+        self.levels.clear()
+        self.drawn = set()
+
+    def update(self, *args):
+        """Draws the tiles of the visible viewport that are not on the canvas yet"""
+        if self.image is None: return
+        tiles = self.levels[(id(self.image), self.scale)][1]
+        t = self.TILE_SIZE
+        ox, oy = self.origin
+        x0 = self.canvas.canvasx(0) - ox
+        y0 = self.canvas.canvasy(0) - oy
+        x1 = x0 + self.canvas.winfo_width()
+        y1 = y0 + self.canvas.winfo_height()
+
+        cols = range(max(0, int(x0 // t)), min(math.ceil(self.size[0] / t), int(x1 // t) + 1))
+        rows = range(max(0, int(y0 // t)), min(math.ceil(self.size[1] / t), int(y1 // t) + 1))
+        added = False
+        for row in rows:
+            for col in cols:
+                if (col, row) in self.drawn: continue
+                tile = tiles.get((col, row))
+                if tile is None:
+                    tile = tiles[(col, row)] = self._render_tile(col, row)
+                self.canvas.create_image(ox + col * t, oy + row * t, image=tile, anchor="nw", tags=self.tag)
+                self.drawn.add((col, row))
+                added = True
+        if added:
+            # Keep overlays (crop rectangle) above the page
+            self.canvas.tag_lower(self.tag)
+
+    def _render_tile(self, col, row):
+        t = self.TILE_SIZE
+        left, top = col * t, row * t
+        right, bottom = min(left + t, self.size[0]), min(top + t, self.size[1])
+        s = self.scale
+        # Resample just the source region of this tile, never the whole page
+        box = (left / s, top / s, right / s, bottom / s)
+        tile = self.image.resize((right - left, bottom - top), Image.Resampling.LANCZOS, box=box)
+        return ImageTk.PhotoImage(tile)
@@ -1,11 +1,14 @@
 import sys
 import os
+import multiprocessing
 
 # Add the current directory to sys.path to ensure imports work correctly
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.ui.main_window import ScannerApp
-
 if __name__ == "__main__":
+    # Export worker processes re-run this module in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    # Imported here so spawned workers never load the UI
+    from app.ui.main_window import ScannerApp
     app = ScannerApp()
     app.mainloop()
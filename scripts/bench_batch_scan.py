@@ -0,0 +1,87 @@
+"""
+Benchmark: batch scanning throughput and memory with the simulator scanner backend (no hardware, no UI).
+Usage: python scripts/bench_batch_scan.py [source dir or multi-page TIFF] [pages] [pages/min] [workers]
+Without a source, synthetic A4 pages at 200 dpi are generated (every 5th one blank).
+"""
+import sys
+import os
+import queue
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.getcwd())
+
+from app.services.scanner_service import ScannerService, SimulatorBackend
+from app.services.batch_pipeline import BatchScanPipeline
+from app.services.image_service import ImageProcessor
+
+THUMB_SIZE = (70, 60)
+
+
+def make_source(folder, count, size=(1654, 2339)):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        data = np.full((size[1], size[0]), 245, dtype=np.uint8)
+        if i % 5 != 4:
+            # Text-like lines of dark noise
+            for y in range(200, size[1] - 200, 60):
+                data[y:y + 20, 150:size[0] - 150] = rng.integers(0, 120, size=(20, size[0] - 300), dtype=np.uint8)
+        Image.fromarray(data).convert("RGB").save(os.path.join(folder, f"page_{i:04d}.png"))
+
+
+def process(img):
+    """Same work as the app's batch worker: blank check and thumbnail"""
+    confidence = ImageProcessor.blank_page_confidence(img)
+    if confidence >= ImageProcessor.BLANK_CONFIDENCE: return None
+    return img, ImageProcessor.make_thumbnail(img, THUMB_SIZE), confidence
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "-" else None
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+
+    with tempfile.TemporaryDirectory() as folder:
+        if source is None:
+            make_source(folder, count)
+            source = folder
+
+        service = ScannerService(SimulatorBackend(source, pages_per_minute=rate, loop=True))
+        ui_queue = queue.Queue()  # Stands in for Tk's after()
+        done = threading.Event()
+        kept = []
+        skipped = [0]
+
+        def deliver(results):
+            for result in results:
+                if result is None: skipped[0] += 1
+                else: kept.append(result[1])  # The app keeps pages spilled to disk, keep thumbnails only
+
+        tracemalloc.start()
+        pipeline = BatchScanPipeline(service.scan_document, process, deliver, ui_queue.put,
+                                     on_finished=done.set, on_error=lambda e: done.set(),
+                                     target=count, workers=workers)
+        start = time.perf_counter()
+        pipeline.start()
+        while not done.is_set():
+            try:
+                ui_queue.get(timeout=0.5)()
+            except queue.Empty:
+                pass
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{pipeline.delivered} pages ({skipped[0]} blank) in {elapsed:.2f} s, {workers} workers, "
+              f"rate limit {rate or 'none'} pages/min")
+        print(f"throughput {pipeline.pages_per_minute:.1f} pages/min | peak traced memory {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
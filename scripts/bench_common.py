@@ -0,0 +1,12 @@
+"""
+Shared helpers of the benchmark scripts (not a benchmark itself).
+"""
+import numpy as np
+
+
+def make_scan_array(size, bands=3, seed=0):
+    """Mostly white paper with dark "text" noise, like a real scan: a (height, width, bands) uint8 array"""
+    rng = np.random.default_rng(seed)
+    data = np.full((size[1], size[0], bands), 235, dtype=np.uint8)
+    data[..., :3] -= rng.integers(0, 60, size=(size[1], size[0], 1), dtype=np.uint8)
+    return data
@@ -0,0 +1,49 @@
+"""
+Benchmark: PDF export wall-clock time by number of worker processes.
+Usage: python scripts/bench_export_workers.py [pages] [width] [height]
+"""
+import sys
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.append(os.getcwd())
+
+from app.services.edit_pipeline import EditPipeline
+from app.services.pdf_writer import write_pdf
+from bench_common import make_scan_array
+
+
+def make_page(index, size):
+    data = make_scan_array(size, seed=index)
+    page = dict(EditPipeline.NO_EDITS, original=Image.fromarray(data, 'RGB'))
+    page.update(brightness=1.1, contrast=1.2)
+    return page
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 2480
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 3508
+
+    pages = [make_page(i, (width, height)) for i in range(count)]
+    cores = os.cpu_count() or 1
+    workers_list = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    print(f"{count} pages of {width}x{height}, {cores} cores")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.pdf")
+        baseline = None
+        for workers in workers_list:
+            start = time.perf_counter()
+            write_pdf(path, pages, EditPipeline.snapshot, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers {workers:>2}: {elapsed:7.2f} s | {count / elapsed:6.1f} pages/s | "
+                  f"speedup {baseline / elapsed:4.1f}x | {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: coarse-to-fine skew estimation of auto_straighten_simple vs. the previous 21-rotation sweep.
+Usage: python scripts/bench_straighten.py [pages] [width] [height]
+Synthetic text pages are rotated by known angles; the table shows the angle error and runtime of both.
+"""
+import sys
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.getcwd())
+
+from app.services.image_service import ImageProcessor
+
+
+def legacy_estimate(img):
+    """The angle search of auto_straighten_simple before the coarse-to-fine version"""
+    best_angle = 0
+    best_score = 0
+    for angle in range(-10, 11, 1):
+        rotated = img.rotate(angle, expand=False, fillcolor=255)
+        projection = np.sum(255 - np.array(rotated), axis=1)
+        score = np.var(projection)
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
+
+
+def make_page(index, size):
+    rng = np.random.default_rng(index)
+    # Paper with lines of "words" of dark noise, like a scanned text page
+    data = np.full((size[1], size[0]), 240, dtype=np.uint8)
+    margin = size[0] // 12
+    for y in range(margin, size[1] - margin, 70):
+        x = margin
+        while x < size[0] - margin:
+            word = int(rng.integers(60, 260))
+            data[y:y + 28, x:min(x + word, size[0] - margin)] = rng.integers(0, 110, dtype=np.uint8)
+            x += word + 30
+    return Image.fromarray(data)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 2480
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 3508
+
+    rng = np.random.default_rng(42)
+    print(f"{count} pages of {width}x{height}")
+    print(f"{'skew':>7} | {'legacy':>7} {'error':>6} {'time':>8} | {'new':>7} {'error':>6} {'time':>8}")
+    errors = {'legacy': [], 'new': []}
+    times = {'legacy': [], 'new': []}
+    for i in range(count):
+        skew = round(float(rng.uniform(-9.5, 9.5)), 2)
+        # Rotating by skew is corrected by rotating by -skew
+        page = make_page(i, (width, height)).rotate(skew, expand=False, fillcolor=240, resample=Image.Resampling.BILINEAR)
+        row = []
+        for name, estimate in (('legacy', legacy_estimate), ('new', ImageProcessor.estimate_skew_angle)):
+            start = time.perf_counter()
+            angle = estimate(page)
+            elapsed = time.perf_counter() - start
+            errors[name].append(abs(angle + skew))
+            times[name].append(elapsed)
+            row.append(f"{angle:7.2f} {abs(angle + skew):6.2f} {elapsed * 1000:6.0f}ms")
+        print(f"{skew:7.2f} | " + " | ".join(row))
+
+    for name in ('legacy', 'new'):
+        print(f"{name:>6}: mean error {np.mean(errors[name]):.3f} deg, max {np.max(errors[name]):.3f} deg, "
+              f"mean time {np.mean(times[name]) * 1000:.0f} ms")
+    print(f"speedup {np.mean(times['legacy']) / np.mean(times['new']):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+pytest.importorskip("cv2")
+
+from app.services.image_service import ImageProcessor
+
+
+def noisy_blank_page(size=(2480, 3508), seed=0):
+    """A4 at 300 dpi: off-white paper with scanner noise and a few dust specks"""
+    rng = np.random.default_rng(seed)
+    data = np.clip(240 + rng.normal(0, 6, (size[1], size[0])), 0, 255).astype(np.uint8)
+    page = Image.fromarray(data)
+    draw = ImageDraw.Draw(page)
+    for x, y in rng.integers(100, 2300, (5, 2)):
+        draw.ellipse((x, y, x + 4, y + 4), fill=90)
+    return page
+
+
+def test_noisy_blank_page_is_dropped():
+    page = noisy_blank_page()
+    assert ImageProcessor.blank_page_confidence(page) >= ImageProcessor.BLANK_CONFIDENCE
+    assert ImageProcessor.detect_blank_page(page)
+
+
+def test_page_with_one_line_is_flagged_not_dropped():
+    page = noisy_blank_page()
+    # A single dark rule, e.g. a signature line
+    ImageDraw.Draw(page).rectangle((600, 2900, 1400, 2902), fill=20)
+    confidence = ImageProcessor.blank_page_confidence(page)
+    assert ImageProcessor.BLANK_BORDERLINE <= confidence < ImageProcessor.BLANK_CONFIDENCE
+    assert not ImageProcessor.detect_blank_page(page)
+
+
+def test_text_page_is_content():
+    page = noisy_blank_page()
+    draw = ImageDraw.Draw(page)
+    for y in range(300, 3200, 70):
+        draw.rectangle((200, y, 2280, y + 28), fill=30)
+    assert ImageProcessor.blank_page_confidence(page) == 0.0
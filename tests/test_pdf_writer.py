@@ -0,0 +1,47 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.pdf_writer import BILEVEL, COLOR, GRAYSCALE, classify_page
+
+
+def text_page(size=(1240, 1754)):
+    """White page with black lines of text blocks"""
+    page = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(page)
+    for y in range(120, size[1] - 400, 40):
+        draw.rectangle((100, y, size[0] - 100, y + 12), fill="black")
+    return page
+
+
+def test_signed_and_stamped_page_stays_color():
+    page = text_page()
+    draw = ImageDraw.Draw(page)
+    # Blue pen signature and a red stamp outline, together well under 1% of the page
+    draw.line([(200, 1500), (320, 1440), (420, 1520), (540, 1450)], fill=(30, 40, 170), width=3)
+    draw.ellipse((800, 1380, 1000, 1580), outline=(200, 30, 30), width=6)
+    rgb = np.asarray(page, dtype=np.int16)
+    coloured = np.count_nonzero(rgb.max(axis=2) - rgb.min(axis=2) > 24) / (page.width * page.height)
+    assert coloured < 0.006
+
+    assert classify_page(page) == COLOR
+
+
+def test_black_and_white_page_is_bilevel():
+    assert classify_page(text_page()) == BILEVEL
+
+
+def test_stray_coloured_pixels_do_not_make_page_color():
+    page = text_page()
+    rng = np.random.default_rng(0)
+    data = np.asarray(page).copy()
+    # A handful of isolated chroma noise pixels
+    ys = rng.integers(0, page.height, 20)
+    xs = rng.integers(0, page.width, 20)
+    data[ys, xs] = (255, 200, 200)
+    assert classify_page(Image.fromarray(data)) != COLOR
+
+
+def test_pencil_page_is_grayscale():
+    page = text_page()
+    ImageDraw.Draw(page).rectangle((100, 1500, 900, 1560), fill=(150, 150, 150))
+    assert classify_page(page) == GRAYSCALE